@@ -9,7 +9,7 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "dashboard"))
-from athena_helper import AthenaHelper
+from athena_helper import AthenaHelper, DiskResultCache, MemoryResultCache
 
 sys.path.insert(0, os.path.dirname(__file__))
 from auth import get_api_key
@@ -62,7 +62,12 @@ class StatsResponse(BaseModel):
     avg_skills_per_job: float
     unique_skills: int
 
-athena = AthenaHelper()
+# Every Athena query is a paid scan: reuse results until the processed data changes
+cache_dir = os.environ.get("ATHENA_CACHE_DIR")
+cache = DiskResultCache(cache_dir) if cache_dir else MemoryResultCache()
+if cache_dir and not cache.trusted:
+    logger.warning(f"Not caching in {cache_dir}: it must be owned by this user and not group/world writable")
+athena = AthenaHelper(cache=cache)
 
 @app.get("/")
 async def root():
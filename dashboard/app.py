@@ -588,34 +588,22 @@ def load_all_data():
     athena = get_athena()
     stats_df = athena.get_job_stats()
     skills_df = athena.get_top_skills(limit=100)
-    skills_df["job_count"] = skills_df["job_count"].astype(int)
-    skills_df["percentage"] = skills_df["percentage"].astype(float)
     return stats_df, skills_df
 
 @st.cache_data(ttl=300)
 def get_all_jobs_with_skills():
-    """Get all jobs with their skills from Athena"""
+    """Get all jobs with their skills from Athena (one posting per near-duplicate cluster)"""
     athena = get_athena()
     
     query = """
     SELECT id, title, company, skills, skill_count
     FROM jobs_with_skills
     WHERE skill_count > 0
+    AND duplicate_of IS NULL
     """
     
     return athena.run_query(query)
 
-@st.cache_data(ttl=300)
-def parse_skills_from_string(skills_str):
-    """Parse skills array from string format"""
-    if not skills_str or skills_str == '[]':
-        return []
-    
-    skills_str = skills_str.strip('[]').replace("'", "").replace('"', '')
-    skills = [s.strip() for s in skills_str.split(',') if s.strip()]
-    
-    return skills
-
 @st.cache_data(ttl=300)
 def calculate_skill_cooccurrence(min_support=5):
     """Calculate real skill co-occurrence from Athena data"""
@@ -624,9 +612,7 @@ def calculate_skill_cooccurrence(min_support=5):
     cooccurrence = defaultdict(int)
     skill_frequencies = defaultdict(int)
     
-    for _, row in jobs_df.iterrows():
-        skills = parse_skills_from_string(row['skills'])
-        
+    for skills in jobs_df['skills']:
         for skill in skills:
             skill_frequencies[skill] += 1
         
@@ -663,6 +649,7 @@ def get_skills_for_job_title(job_keyword):
     FROM jobs_with_skills
     WHERE LOWER(title) LIKE '%{job_keyword.lower()}%'
     AND skill_count > 0
+    AND duplicate_of IS NULL
     """
     
     jobs_df = athena.run_query(query)
@@ -673,8 +660,7 @@ def get_skills_for_job_title(job_keyword):
     skill_counts = defaultdict(int)
     total_jobs = len(jobs_df)
     
-    for _, row in jobs_df.iterrows():
-        skills = parse_skills_from_string(row['skills'])
+    for skills in jobs_df['skills']:
         for skill in skills:
             skill_counts[skill] += 1
     
@@ -694,6 +680,7 @@ def get_common_job_titles(limit=20):
     SELECT title, COUNT(*) as count
     FROM jobs_with_skills
     WHERE skill_count > 0
+    AND duplicate_of IS NULL
     GROUP BY title
     ORDER BY count DESC
     LIMIT {limit}
@@ -710,7 +697,7 @@ def get_job_titles_by_skills(selected_skills):
     matching_jobs = []
     
     for _, row in jobs_df.iterrows():
-        job_skills = parse_skills_from_string(row['skills'])
+        job_skills = row['skills']
         
         if not job_skills:
             continue
@@ -737,9 +724,6 @@ def calculate_seniority_stats():
     """Calculate statistics by seniority level"""
     jobs_df = get_all_jobs_with_skills()
     
-    # Convert skill_count to numeric
-    jobs_df['skill_count'] = pd.to_numeric(jobs_df['skill_count'], errors='coerce')
-    
     seniority_map = {
         'Junior': ['junior', 'entry', 'associate', 'jr'],
         'Mid-Level': ['mid', 'intermediate', 'level ii', 'level 2'],
@@ -767,8 +751,7 @@ def calculate_seniority_stats():
         seniority_jobs = jobs_df[jobs_df['seniority'] == seniority]
         skill_counts = defaultdict(int)
         
-        for _, row in seniority_jobs.iterrows():
-            skills = parse_skills_from_string(row['skills'])
+        for skills in seniority_jobs['skills']:
             for skill in skills:
                 skill_counts[skill] += 1
         
@@ -1,54 +1,570 @@
+"""
+Athena access for the dashboard, the API and the analytics scripts
+Results are streamed page by page: GetQueryResults pages are fetched ahead
+on a background thread, following NextToken, while earlier pages are
+decoded, and DataFrames are built column-wise from the row batches, each
+column decoded once by its Athena type. Large results are instead read in
+bulk from the CSV file Athena writes to the output location. Query status
+is polled with exponential backoff, and the timings of recent queries are
+kept in AthenaHelper.query_stats. run_query results can be cached, in
+memory or on disk, until the processed data changes.
+"""
+import hashlib
+import json
+import os
+import pickle
+import queue
+import re
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
 import boto3
 import time
+import numpy as np
 import pandas as pd
 
+PAGE_SIZE = 1000  # The most rows GetQueryResults returns per call
+DEFAULT_PREFETCH_PAGES = 4
+# Results with more rows are downloaded from S3 instead of paged through
+DEFAULT_BULK_THRESHOLD_ROWS = 10_000
+CSV_CHUNK_ROWS = 50_000
+# Status polling: first wait, growth per poll and longest wait, in seconds
+POLL_INITIAL_SECONDS = 0.1
+POLL_BACKOFF = 2
+POLL_MAX_SECONDS = 2.0
+DEFAULT_QUERY_TIMEOUT = 300  # Seconds before a query is cancelled
+QUERY_STATS_HISTORY = 100
+
+INTEGER_TYPES = {'tinyint', 'smallint', 'integer', 'int', 'bigint'}
+FLOAT_TYPES = {'float', 'real', 'double', 'decimal'}
+DATETIME_TYPES = {'date': 'datetime64[D]', 'timestamp': 'datetime64[ms]'}
+
+# Rewritten by lambda/etl_trigger.py once uploads are registered, and by compaction
+DATA_VERSION_URL = 's3://job-skills-raw-624943535027/processed/_data_version'
+DATA_VERSION_CHECK_SECONDS = 10
+DEFAULT_CACHE_ENTRIES = 128
+CACHE_MAX_AGE_SECONDS = 3600  # Backstop for changes that bypass the marker
+
+def split_s3_url(url):
+    """'s3://bucket/key' -> (bucket, key)"""
+    if not url.startswith('s3://'):
+        raise ValueError(f"Not an s3:// URL: {url}")
+    bucket, _, key = url[len('s3://'):].partition('/')
+    return bucket, key
+
+def _parse_array(value):
+    """'[a, b]' -> ['a', 'b'] (Athena's text form of an array)
+
+    NULL ('') decodes as [], so callers can iterate every value.
+    """
+    inner = value[1:-1]
+    return inner.split(', ') if inner else []
+
+def decode_column(values, athena_type):
+    """Decode one column of Athena string values by its ColumnInfo Type
+
+    Integers become int64 and floating point and decimal columns float64
+    (NaN for NULL); integer and boolean columns with NULLs use pandas'
+    nullable Int64 and boolean. Dates and timestamps become datetime64
+    (NaT for NULL), arrays lists of strings ([] for NULL). Other types
+    stay strings, '' for NULL.
+    """
+    athena_type = athena_type.lower()
+    if athena_type.startswith('array'):
+        return [_parse_array(value) for value in values]
+    if (athena_type not in INTEGER_TYPES and athena_type not in FLOAT_TYPES
+            and athena_type not in DATETIME_TYPES and athena_type != 'boolean'):
+        return values
+
+    strings = np.asarray(values, dtype=str)
+    nulls = strings == ''
+    if athena_type in FLOAT_TYPES:
+        return np.where(nulls, 'NaN', strings).astype(np.float64)
+    if athena_type in DATETIME_TYPES:
+        return np.where(nulls, 'NaT', strings).astype(DATETIME_TYPES[athena_type])
+    if athena_type == 'boolean':
+        flags = strings == 'true'
+        return pd.arrays.BooleanArray(flags, nulls) if nulls.any() else flags
+    if not nulls.any():
+        return strings.astype(np.int64)
+    return pd.arrays.IntegerArray(np.where(nulls, '0', strings).astype(np.int64), nulls)
+
+def normalize_sql(query):
+    """Query text with whitespace outside string literals collapsed, for cache keys"""
+    parts = re.split(r"('(?:[^']|'')*')", query.strip().rstrip(';').strip())
+    return ''.join(part if i % 2 else re.sub(r'\s+', ' ', part) for i, part in enumerate(parts))
+
+class MemoryResultCache:
+    """LRU of the max_entries most recently used results"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+def _trusted(st):
+    """Owned by us and not writable by anyone else (always true without uids)"""
+    if not hasattr(os, 'getuid'):
+        return True
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+class DiskResultCache:
+    """Results pickled to one file per key under directory, shared across processes
+
+    Once there are more than max_entries files, the least recently used
+    (by modification time, refreshed on every hit) are removed. Pickles are
+    only loaded when both they and directory belong to the current user and
+    are not group or world writable; otherwise the cache stays unused.
+    """
+
+    def __init__(self, directory, max_entries=DEFAULT_CACHE_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            self.trusted = _trusted(os.stat(directory))
+        except OSError:
+            self.trusted = False
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        if not self.trusted:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                if not _trusted(os.fstat(f.fileno())):
+                    return None
+                entry = pickle.load(f)
+            os.utime(self._path(key))
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Truncated, or pickled by another pandas version: drop it and recompute
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+
+    def put(self, key, entry):
+        if not self.trusted:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl'):
+                try:
+                    files.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+                except FileNotFoundError:  # Evicted by another process
+                    continue
+        for _, name in sorted(files)[:max(0, len(files) - self.max_entries)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+class DataVersionMarker:
+    """Contents of the processed data's version marker, re-read at most every check_seconds
+
+    Returns '' while there is no marker, and None when it cannot be read,
+    which makes AthenaHelper skip its cache.
+    """
+
+    def __init__(self, url=DATA_VERSION_URL, store=None, check_seconds=DATA_VERSION_CHECK_SECONDS):
+        self.url = url
+        self.store = store
+        self.check_seconds = check_seconds
+        self._version = None
+        self._checked_at = None
+
+    def _read(self):
+        if self.store is None:
+            self.store = S3ResultStore()
+        try:
+            with self.store.open(self.url) as f:
+                return f.read().decode('utf-8').strip()
+        except FileNotFoundError:
+            return ''
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return ''
+            return None
+
+    def __call__(self):
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_seconds:
+            self._version = self._read()
+            self._checked_at = now
+        return self._version
+
+class S3ResultStore:
+    """Opens Athena result objects in S3"""
+
+    def __init__(self, client=None):
+        self.client = client or boto3.client('s3', region_name='us-east-1')
+
+    def open(self, url):
+        bucket, key = split_s3_url(url)
+        return self.client.get_object(Bucket=bucket, Key=key)['Body']
+
+class LocalResultStore:
+    """Stand-in for S3ResultStore serving s3://bucket/key from root/bucket/key"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def open(self, url):
+        bucket, key = split_s3_url(url)
+        return open(os.path.join(self.root, bucket, *key.split('/')), 'rb')
+
+@dataclass
+class QueryStats:
+    """Timings of one query; the *_ms fields are Athena's own statistics"""
+    query_execution_id: str
+    state: str
+    engine_ms: int
+    queue_ms: int
+    total_ms: int
+    wait_seconds: float  # From the first status poll until the final state was seen
+    polls: int
+
+    @property
+    def polling_overhead_seconds(self):
+        """How much longer we waited than the query took in Athena"""
+        return max(0.0, self.wait_seconds - self.total_ms / 1000)
+
+class PagePrefetcher:
+    """Iterator over the GetQueryResults pages of a query, fetched ahead
+
+    A background thread follows NextToken and keeps at most max_pages pages
+    waiting in a bounded queue, so network round trips overlap with the
+    consumer's decoding. Errors are raised in the consuming thread.
+    """
+
+    def __init__(self, client, query_execution_id, max_pages=DEFAULT_PREFETCH_PAGES):
+        self._queue = queue.Queue(max_pages)
+        self._stopped = threading.Event()
+        self._done = False
+        self._thread = threading.Thread(target=self._produce, args=(client, query_execution_id),
+                                        daemon=True)
+        self._thread.start()
+
+    def _produce(self, client, query_execution_id):
+        try:
+            request = {'QueryExecutionId': query_execution_id, 'MaxResults': PAGE_SIZE}
+            while not self._stopped.is_set():
+                page = client.get_query_results(**request)
+                self._queue.put(page)
+                if not page.get('NextToken'):
+                    break
+                request['NextToken'] = page['NextToken']
+            self._queue.put(None)
+        except BaseException as e:
+            self._queue.put(e)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._done:
+            raise StopIteration
+        item = self._queue.get()
+        if item is None or isinstance(item, BaseException):
+            self._done = True
+            if item is not None:
+                raise item
+            raise StopIteration
+        return item
+
+    def close(self):
+        self._stopped.set()
+        self._done = True
+        # Unblock a producer waiting on a full queue
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+class QueryResult:
+    """Result of a finished query, streamed in row batches of up to one page
+
+    column_info is Athena's ColumnInfo list. Iterating yields lists of rows,
+    each a list of string values ('' for NULL); to_dataframe() builds a
+    DataFrame from all remaining batches, with typed columns (decode_column).
+    A result can be iterated once.
+    """
+
+    def __init__(self, query_execution_id, pages):
+        self.query_execution_id = query_execution_id
+        self._pages = pages
+        self._first = next(pages, None)
+        metadata = self._first['ResultSet']['ResultSetMetadata'] if self._first else {}
+        self.column_info = metadata.get('ColumnInfo', [])
+
+    @property
+    def columns(self):
+        return [col['Label'] for col in self.column_info]
+
+    @property
+    def single_page(self):
+        """True when the first page holds every row"""
+        return self._first is None or not self._first.get('NextToken')
+
+    def __iter__(self):
+        try:
+            if self._first is not None:
+                page, self._first = self._first, None
+                rows = page['ResultSet']['Rows'][1:]  # Skip header row
+                if rows:
+                    yield self._decode(rows)
+            for page in self._pages:
+                rows = page['ResultSet']['Rows']
+                if rows:
+                    yield self._decode(rows)
+        finally:
+            self.close()
+
+    @staticmethod
+    def _decode(rows):
+        return [[field.get('VarCharValue', '') for field in row['Data']] for row in rows]
+
+    def to_dataframe(self):
+        """All remaining rows as a DataFrame, assembled column by column"""
+        data = [[] for _ in self.column_info]
+        for batch in self:
+            for values, column in zip(zip(*batch), data):
+                column.extend(values)
+        return self._frame(data)
+
+    def _frame(self, data):
+        """DataFrame from one sequence of string values per column"""
+        df = pd.DataFrame({i: decode_column(values, col.get('Type', 'varchar'))
+                           for i, (values, col) in enumerate(zip(data, self.column_info))})
+        df.columns = self.columns
+        return df
+
+    def close(self):
+        """Stop prefetching pages that will not be read"""
+        if hasattr(self._pages, 'close'):
+            self._pages.close()
+
+class CsvQueryResult(QueryResult):
+    """QueryResult read in bulk from the CSV file Athena wrote for the query
+
+    Parsed with pandas' C reader, in batches of CSV_CHUNK_ROWS rows when
+    iterated. Values are strings ('' for NULL) as with paged results, and
+    to_dataframe() decodes the columns the same way.
+    """
+
+    def __init__(self, query_execution_id, column_info, store, location):
+        self.query_execution_id = query_execution_id
+        self.column_info = column_info
+        self._store = store
+        self.location = location
+
+    def _read_csv(self, f, **kwargs):
+        return pd.read_csv(f, header=0, names=range(len(self.column_info)), dtype=str,
+                           keep_default_na=False, na_filter=False, **kwargs)
+
+    def __iter__(self):
+        with self._store.open(self.location) as f:
+            for chunk in self._read_csv(f, chunksize=CSV_CHUNK_ROWS):
+                yield chunk.values.tolist()
+
+    def to_dataframe(self):
+        """All rows as a DataFrame, parsed in one pass"""
+        with self._store.open(self.location) as f:
+            df = self._read_csv(f)
+        return self._frame([df[i].to_numpy() for i in range(len(self.column_info))])
+
+    def close(self):
+        pass
+
 class AthenaHelper:
-    def __init__(self):
+    def __init__(self, prefetch_pages=DEFAULT_PREFETCH_PAGES, result_store=None,
+                 bulk_threshold_rows=DEFAULT_BULK_THRESHOLD_ROWS, timeout=DEFAULT_QUERY_TIMEOUT,
+                 cache=None, data_version=None, cache_max_age=CACHE_MAX_AGE_SECONDS):
+        """result_store opens result CSVs (default S3ResultStore, or a
+        LocalResultStore for tests); bulk_threshold_rows=None always pages;
+        queries running longer than timeout seconds are cancelled (None waits forever)
+
+        cache (a MemoryResultCache or DiskResultCache) caches run_query
+        results by normalized SQL, parameters and data_version(), a callable
+        returning the current version of the data (default DataVersionMarker).
+        Entries older than cache_max_age seconds are refreshed regardless.
+        """
         self.client = boto3.client('athena', region_name='us-east-1')
         self.database = 'job_skills_db'
         self.output_location = 's3://job-skills-athena-results-624943535027/'
-    
-    def run_query(self, query):
-        """Execute Athena query and return results as DataFrame"""
-        # Start query execution
-        response = self.client.start_query_execution(
+        self.prefetch_pages = prefetch_pages
+        self.result_store = result_store
+        self.bulk_threshold_rows = bulk_threshold_rows
+        self.timeout = timeout
+        self.query_stats = deque(maxlen=QUERY_STATS_HISTORY)  # QueryStats, oldest first
+        self.cache = cache
+        self.data_version = data_version if data_version is not None else DataVersionMarker()
+        self.cache_max_age = cache_max_age
+        self.cache_counts = {}  # Normalized SQL -> {'hits': n, 'misses': n}
+
+    def start_query(self, query, params=None):
+        """Start query execution and return its QueryExecutionId
+
+        params are SQL literals for the query's ? placeholders (quote strings: "'python'").
+        """
+        request = dict(
             QueryString=query,
             QueryExecutionContext={'Database': self.database},
             ResultConfiguration={'OutputLocation': self.output_location}
         )
-        
-        query_execution_id = response['QueryExecutionId']
-        
-        # Wait for query to complete
+        if params:
+            request['ExecutionParameters'] = [str(param) for param in params]
+        response = self.client.start_query_execution(**request)
+        return response['QueryExecutionId']
+
+    def wait_for_query(self, query_execution_id):
+        """Block until the query finishes and return its QueryExecution; raise unless it succeeded
+
+        Polls after POLL_INITIAL_SECONDS, then backs off up to POLL_MAX_SECONDS
+        between polls, so short queries return quickly without long ones
+        polling constantly. A query still running after self.timeout seconds
+        is stopped and TimeoutError raised. Timings go to self.query_stats.
+        """
+        started = time.monotonic()
+        deadline = None if self.timeout is None else started + self.timeout
+        delay = POLL_INITIAL_SECONDS
+        polls = 0
         while True:
             result = self.client.get_query_execution(QueryExecutionId=query_execution_id)
+            polls += 1
             status = result['QueryExecution']['Status']['State']
-            
+
             if status in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
                 break
-            time.sleep(1)
-        
-        if status == 'SUCCEEDED':
-            # Get results
-            result = self.client.get_query_results(QueryExecutionId=query_execution_id)
-            
-            # Convert to DataFrame
-            columns = [col['Label'] for col in result['ResultSet']['ResultSetMetadata']['ColumnInfo']]
-            rows = []
-            for row in result['ResultSet']['Rows'][1:]:  # Skip header row
-                rows.append([field.get('VarCharValue', '') for field in row['Data']])
-            
-            return pd.DataFrame(rows, columns=columns)
-        else:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                self.client.stop_query_execution(QueryExecutionId=query_execution_id)
+                self._record_stats(query_execution_id, result['QueryExecution'], 'TIMED_OUT',
+                                   now - started, polls)
+                raise TimeoutError(f"Query {query_execution_id} cancelled after {self.timeout}s")
+            time.sleep(delay if deadline is None else min(delay, deadline - now))
+            delay = min(delay * POLL_BACKOFF, POLL_MAX_SECONDS)
+
+        self._record_stats(query_execution_id, result['QueryExecution'], status,
+                           time.monotonic() - started, polls)
+        if status != 'SUCCEEDED':
             raise Exception(f"Query failed with status: {status}")
-    
+        return result['QueryExecution']
+
+    def _record_stats(self, query_execution_id, execution, state, wait_seconds, polls):
+        statistics = execution.get('Statistics', {})
+        self.query_stats.append(QueryStats(
+            query_execution_id, state,
+            engine_ms=statistics.get('EngineExecutionTimeInMillis', 0),
+            queue_ms=statistics.get('QueryQueueTimeInMillis', 0),
+            total_ms=statistics.get('TotalExecutionTimeInMillis', 0),
+            wait_seconds=wait_seconds, polls=polls,
+        ))
+
+    def _output_rows(self, query_execution_id):
+        """Rows in the query's result, or None when Athena does not report it"""
+        try:
+            stats = self.client.get_query_runtime_statistics(QueryExecutionId=query_execution_id)
+            return stats['QueryRuntimeStatistics']['Rows']['OutputRows']
+        except Exception:
+            return None
+
+    def query_results(self, query_execution_id, result_location=None):
+        """Stream the results of a finished query as a QueryResult
+
+        The first page is always fetched, for the column metadata. When it
+        is not the only page, the result has more than bulk_threshold_rows
+        rows (or Athena cannot say) and result_location is the query's
+        result file, the rest is read from that CSV instead of page by page.
+        """
+        result = QueryResult(query_execution_id,
+                             PagePrefetcher(self.client, query_execution_id, self.prefetch_pages))
+        if result.single_page or self.bulk_threshold_rows is None or not result_location:
+            return result
+        rows = self._output_rows(query_execution_id)
+        if rows is not None and rows <= self.bulk_threshold_rows:
+            return result
+
+        result.close()
+        if self.result_store is None:
+            self.result_store = S3ResultStore()
+        return CsvQueryResult(query_execution_id, result.column_info, self.result_store, result_location)
+
+    def stream_query(self, query, params=None):
+        """Execute Athena query and return its rows as a streaming QueryResult"""
+        query_execution_id = self.start_query(query, params)
+        execution = self.wait_for_query(query_execution_id)
+        result_location = execution.get('ResultConfiguration', {}).get('OutputLocation')
+        return self.query_results(query_execution_id, result_location)
+
+    def run_query(self, query, params=None):
+        """Execute Athena query and return results as DataFrame (every page)
+
+        With a cache, a result computed for the same query and parameters on
+        the current data version is returned (as a copy) without running it.
+        """
+        if self.cache is None:
+            return self.stream_query(query, params).to_dataframe()
+
+        sql = normalize_sql(query)
+        version = self.data_version()
+        counts = self.cache_counts.setdefault(sql, {'hits': 0, 'misses': 0})
+        if version is None:  # Cannot tell whether a cached result is current
+            counts['misses'] += 1
+            return self.stream_query(query, params).to_dataframe()
+
+        key_data = json.dumps([self.database, sql, [str(param) for param in params or ()], version])
+        key = hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+        entry = self.cache.get(key)
+        if entry is not None and time.time() - entry[0] < self.cache_max_age:
+            counts['hits'] += 1
+            return entry[1].copy()
+
+        counts['misses'] += 1
+        df = self.stream_query(query, params).to_dataframe()
+        self.cache.put(key, (time.time(), df.copy()))
+        return df
+
     def get_top_skills(self, limit=15):
-        """Get top skills from Athena"""
+        """Get top skills from Athena, counting each near-duplicate cluster once"""
         query = f"""
         SELECT 
             skill,
-            COUNT(*) as job_count,
-            ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM jobs_with_skills WHERE skill_count > 0), 2) as percentage
+            COUNT(DISTINCT COALESCE(duplicate_of, id)) as job_count,
+            ROUND(COUNT(DISTINCT COALESCE(duplicate_of, id)) * 100.0 / (SELECT COUNT(DISTINCT COALESCE(duplicate_of, id)) FROM jobs_with_skills WHERE skill_count > 0), 2) as percentage
         FROM jobs_with_skills
         CROSS JOIN UNNEST(skills) AS t(skill)
         GROUP BY skill
@@ -58,12 +574,12 @@ class AthenaHelper:
         return self.run_query(query)
     
     def get_job_stats(self):
-        """Get overall job statistics"""
+        """Get overall job statistics, counting each near-duplicate cluster once"""
         query = """
         SELECT 
-            COUNT(*) as total_jobs,
-            COUNT(DISTINCT CASE WHEN skill_count > 0 THEN id END) as jobs_with_skills,
-            AVG(skill_count) as avg_skills
+            COUNT(DISTINCT COALESCE(duplicate_of, id)) as total_jobs,
+            COUNT(DISTINCT CASE WHEN skill_count > 0 THEN COALESCE(duplicate_of, id) END) as jobs_with_skills,
+            AVG(CASE WHEN duplicate_of IS NULL THEN skill_count END) as avg_skills
         FROM jobs_with_skills
         """
         return self.run_query(query)
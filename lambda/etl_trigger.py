@@ -1,15 +1,46 @@
 import json
+import time
+import uuid
 import boto3
 from datetime import datetime
 
+# Marker the API's Athena result cache is keyed on; Athena skips '_' files
+DATA_VERSION_NAME = '_data_version'
+# Time kept back from the repair wait to write the marker and send the SNS email
+REPORTING_SECONDS = 15
+
+def wait_for_query(athena, query_id, timeout=240):
+    """Poll with backoff until the query finishes; raise unless it succeeded"""
+    deadline = time.monotonic() + timeout
+    delay = 0.2
+    while True:
+        status = athena.get_query_execution(QueryExecutionId=query_id)['QueryExecution']['Status']
+        if status['State'] == 'SUCCEEDED':
+            return
+        if status['State'] in ('FAILED', 'CANCELLED'):
+            raise Exception(f"Athena query {query_id} {status['State']}: {status.get('StateChangeReason', '')}")
+        if time.monotonic() > deadline:
+            raise Exception(f"Athena query {query_id} still running after {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, 5)
+
+def data_version_key(key):
+    """processed/dt=.../part.parquet -> processed/_data_version"""
+    prefix, found, _ = key.partition('dt=')
+    return (prefix if found else 'processed/') + DATA_VERSION_NAME
+
 def lambda_handler(event, context):
     """
     Triggered when new data uploaded to S3.
     Updates Athena table and sends email notification.
+    Once the table is updated, the data version marker is rewritten so
+    cached query results are refreshed; doing it earlier would let them be
+    recomputed, and cached, before a new partition is visible.
     """
     
     athena = boto3.client('athena', region_name='us-east-1')
     sns = boto3.client('sns', region_name='us-east-1')
+    s3 = boto3.client('s3', region_name='us-east-1')
     
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
     
@@ -19,7 +50,15 @@ def lambda_handler(event, context):
             bucket = event['Records'][0]['s3']['bucket']['name']
             key = event['Records'][0]['s3']['object']['key']
             size = event['Records'][0]['s3']['object'].get('size', 0)
-            
+
+            # Compaction stages files under hidden names that Athena ignores
+            if key.rsplit('/', 1)[-1].startswith(('.', '_')):
+                print(f"Skipping hidden object: s3://{bucket}/{key}")
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({'message': 'Skipped hidden object', 'file': key})
+                }
+
             print(f"Lambda triggered at {timestamp}")
             print(f"New file: s3://{bucket}/{key}")
             print(f"Size: {size} bytes")
@@ -42,6 +81,17 @@ def lambda_handler(event, context):
         query_id = response['QueryExecutionId']
         print(f"Athena query started: {query_id}")
         
+        # New partitions are only visible once the repair has finished
+        if context is not None:
+            wait_for_query(athena, query_id,
+                           timeout=context.get_remaining_time_in_millis() / 1000 - REPORTING_SECONDS)
+        else:
+            wait_for_query(athena, query_id)
+        if 'Records' in event:
+            s3.put_object(Bucket=bucket, Key=data_version_key(key),
+                          Body=f"{timestamp} {uuid.uuid4().hex}\n".encode('ascii'))
+            print(f"Data version updated: s3://{bucket}/{data_version_key(key)}")
+        
         # Send SUCCESS notification via SNS
         sns.publish(
             TopicArn='arn:aws:sns:us-east-1:624943535027:job-skills-alerts',
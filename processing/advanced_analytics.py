@@ -20,21 +20,17 @@ class AdvancedAnalytics:
         SELECT id, skills, skill_count
         FROM jobs_with_skills
         WHERE skill_count >= 2
+        AND duplicate_of IS NULL
         """
         
         df = self.athena.run_query(query)
         
         cooccurrence = defaultdict(int)
         
-        for _, row in df.iterrows():
-            try:
-                skills_list = eval(row["skills"]) if isinstance(row["skills"], str) else row["skills"]
-                
-                for skill1, skill2 in combinations(sorted(skills_list), 2):
-                    pair = f"{skill1} + {skill2}"
-                    cooccurrence[pair] += 1
-            except:
-                continue
+        for skills_list in df["skills"]:
+            for skill1, skill2 in combinations(sorted(skills_list), 2):
+                pair = f"{skill1} + {skill2}"
+                cooccurrence[pair] += 1
         
         results = [(pair, count) for pair, count in cooccurrence.items() if count >= min_count]
         results.sort(key=lambda x: x[1], reverse=True)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Staged asyncio ingestion pipeline
+read -> decode -> normalize/extract (process pool) -> write, connected by
+bounded queues so a slow stage throttles the ones feeding it, memory stays
+flat, and file/S3 I/O overlaps with CPU work in the pool.
+"""
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from etl_pipeline import ETLSummary, print_summary, process_record
+from json_codec import BACKEND as JSON_BACKEND, decode_lines, encode_lines
+from jsonl_reader import is_compressed, open_input
+from parquet_writer import ParquetJobWriter, DEFAULT_ROW_GROUP_SIZE, DEFAULT_COMPRESSION
+from progress import ProgressReporter, StageTimer
+from skill_matcher import ExtractionCache, SkillMatcher
+from storage import open_storage, split_location
+
+DEFAULT_QUEUE_SIZE = 8
+
+# Per-process matcher for the pool, set by _init_pool_worker
+_pool_matcher = None
+
+def _init_pool_worker(skills_dict_file, cache_size, fuzzy=False):
+    global _pool_matcher
+    _pool_matcher = SkillMatcher.load(skills_dict_file, fuzzy=fuzzy)
+    if cache_size:
+        _pool_matcher = ExtractionCache(_pool_matcher, cache_size)
+
+def _extract_batch(raw_jobs):
+    """Pool task: normalize and extract a batch; returns jobs, timings, cache (hits, misses)"""
+    cache = _pool_matcher if isinstance(_pool_matcher, ExtractionCache) else None
+    hits_before, misses_before = (cache.hits, cache.misses) if cache else (0, 0)
+    timings = defaultdict(float)
+    jobs = [process_record(raw_job, _pool_matcher, timings) for raw_job in raw_jobs]
+    cache_counts = (cache.hits - hits_before, cache.misses - misses_before) if cache else (0, 0)
+    return jobs, timings, cache_counts
+
+class PipelineQueues:
+    """The bounded queues between stages; depths() shows where work piles up"""
+
+    NAMES = ('read→decode', 'decode→extract', 'extract→write')
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.queues = [asyncio.Queue(maxsize) for _ in self.NAMES]
+        self.max_depths = [0] * len(self.NAMES)
+
+    def depths(self):
+        """Current {queue name: items waiting}"""
+        return {name: queue.qsize() for name, queue in zip(self.NAMES, self.queues)}
+
+    def sample(self):
+        for i, queue in enumerate(self.queues):
+            self.max_depths[i] = max(self.max_depths[i], queue.qsize())
+
+    def format(self):
+        return ' | '.join(f"{name} {depth}/{self.maxsize}" for name, depth in self.depths().items())
+
+def _read_batch(f, batch_size):
+    """Blocking read of up to batch_size lines; returns (lines, bytes)"""
+    lines = []
+    size = 0
+    for line in f:
+        lines.append(line)
+        size += len(line)
+        if len(lines) >= batch_size:
+            break
+    return lines, size
+
+async def _read_stage(f, batch_size, out_queue, timer):
+    while True:
+        start = time.perf_counter()
+        lines, size = await asyncio.to_thread(_read_batch, f, batch_size)
+        timer.add('read', time.perf_counter() - start)
+        if not lines:
+            break
+        await out_queue.put((lines, size))
+    await out_queue.put(None)
+
+async def _decode_stage(in_queue, out_queue, timer):
+    while (item := await in_queue.get()) is not None:
+        lines, size = item
+        start = time.perf_counter()
+        records, errors = await asyncio.to_thread(decode_lines, lines)
+        timer.add('parse', time.perf_counter() - start)
+        await out_queue.put((records, errors, len(lines), size))
+    await out_queue.put(None)
+
+async def _extract_stage(in_queue, out_queue, pool):
+    loop = asyncio.get_running_loop()
+    while (item := await in_queue.get()) is not None:
+        records, errors, line_count, size = item
+        # Futures are queued in input order, so the writer keeps that order
+        future = loop.run_in_executor(pool, _extract_batch, records)
+        await out_queue.put((future, errors, line_count, size))
+    await out_queue.put(None)
+
+async def _write_stage(in_queue, write, summary, timer, progress):
+    lines_done = 0
+    bytes_done = 0
+    while (item := await in_queue.get()) is not None:
+        future, errors, line_count, size = item
+        jobs, timings, (cache_hits, cache_misses) = await future
+        timer.merge(timings)
+        summary.cache_hits += cache_hits
+        summary.cache_misses += cache_misses
+        for index, error in errors:
+            print(f"   ✗ Error on line {lines_done + index}: {error}")
+        lines_done += line_count
+        bytes_done += size
+
+        start = time.perf_counter()
+        await asyncio.to_thread(write, jobs)
+        timer.add('write', time.perf_counter() - start)
+
+        summary.jobs_processed += len(jobs)
+        summary.errors += len(errors)
+        for job in jobs:
+            for skill in job['skills']:
+                summary.skill_stats[skill] += 1
+        progress.update(len(jobs), bytes_done)
+
+async def _monitor(queues, interval, stream):
+    """Sample queue depths often, print them every interval seconds"""
+    last_report = time.monotonic()
+    while True:
+        await asyncio.sleep(min(interval, 0.1))
+        queues.sample()
+        if time.monotonic() - last_report >= interval:
+            last_report = time.monotonic()
+            stream.write(f"   📥 queues: {queues.format()}\n")
+
+async def _run(raw_jobs_file, write, summary, pool, batch_size, queue_size, timer, progress, progress_interval):
+    queues = PipelineQueues(queue_size)
+    read_q, decode_q, write_q = queues.queues
+    monitor = asyncio.create_task(_monitor(queues, progress_interval, sys.stderr))
+    try:
+        with open_input(raw_jobs_file) as f:
+            await asyncio.gather(
+                _read_stage(f, batch_size, read_q, timer),
+                _decode_stage(read_q, decode_q, timer),
+                _extract_stage(decode_q, write_q, pool),
+                _write_stage(write_q, write, summary, timer, progress),
+            )
+    finally:
+        monitor.cancel()
+    return queues
+
+def run_pipeline(raw_jobs_file, skills_dict_file, output_file, workers=1, batch_size=1000,
+                 queue_size=DEFAULT_QUEUE_SIZE, output_format='jsonl', dt=None,
+                 row_group_size=DEFAULT_ROW_GROUP_SIZE, compression=DEFAULT_COMPRESSION,
+                 cache_size=0, s3_endpoint_url=None, s3_local_root=None,
+                 progress_interval=2.0, timings_file=None, fuzzy=False):
+    """Run the ETL as a staged asyncio pipeline and return an ETLSummary
+
+    Each queue holds at most queue_size batches of batch_size lines. Queue
+    depths are printed every progress_interval seconds: a full queue points
+    at a slow stage after it, an empty one at a slow stage before it.
+    Output is streamed in input order; checkpoints and dedup are not
+    supported in this mode. fuzzy=True matches misspelled aliases as in
+    process_jobs.
+    """
+    print("📚 Loading skills dictionary...")
+    matcher = SkillMatcher.load(skills_dict_file, fuzzy=fuzzy)
+    print(f"   Loaded {len(matcher.skills)} skills{' (fuzzy matching)' if fuzzy else ''}")
+    print(f"\n📊 Processing jobs (pipeline, {workers} worker{'s' if workers != 1 else ''})...")
+
+    summary = ETLSummary(output_file=output_file)
+    if output_format == 'parquet':
+        sink = ParquetJobWriter(open_storage(output_file, s3_endpoint_url, s3_local_root),
+                                dt, row_group_size, compression)
+        summary.output_file = sink.path
+        write = sink.write
+    else:
+        output_dir, output_key = split_location(output_file)
+        sink = open_storage(output_dir, s3_endpoint_url, s3_local_root).open_writer(output_key)
+        write = lambda jobs: sink.write(encode_lines(jobs))
+
+    timer = StageTimer()
+    progress = ProgressReporter(
+        total_bytes=None if is_compressed(raw_jobs_file) else os.path.getsize(raw_jobs_file),
+        interval=progress_interval
+    )
+    try:
+        with ProcessPoolExecutor(max(workers, 1), initializer=_init_pool_worker,
+                                 initargs=(skills_dict_file, cache_size, fuzzy)) as pool:
+            queues = asyncio.run(_run(raw_jobs_file, write, summary, pool, batch_size, queue_size,
+                                      timer, progress, progress_interval))
+    except BaseException:
+        sink.abort()
+        raise
+
+    start = time.perf_counter()
+    sink.close()
+    timer.add('write', time.perf_counter() - start)
+
+    summary.elapsed_seconds = progress.finish()
+    summary.stage_seconds = dict(timer.seconds)
+    report = timer.report(summary.elapsed_seconds, rows=summary.jobs_processed,
+                          input_bytes=progress.bytes_done, workers=workers,
+                          cache_hits=summary.cache_hits, cache_misses=summary.cache_misses,
+                          json_codec=JSON_BACKEND,
+                          max_queue_depths=dict(zip(queues.NAMES, queues.max_depths)))
+    if timings_file:
+        with open(timings_file, 'w') as f:
+            f.write(report + '\n')
+
+    print_summary(summary, report, show_cache=bool(cache_size))
+    return summary
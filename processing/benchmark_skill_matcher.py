@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Skill matcher benchmark: extraction throughput against dictionary size
+Grows the real skills dictionary with synthetic taxonomy entries (one to
+three word aliases, a few per skill) and times cold build, cached load and
+matching over real postings at each size. --fuzzy benchmarks matchers
+with the typo-tolerant index instead.
+Load plus compile stays under a second only on warm starts: at 50k skills
+(300k aliases) a cached load takes ~0.3s, a cold build ~1.1s.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import tempfile
+import time
+
+from json_codec import loads
+from skill_matcher import SkillMatcher
+
+SYLLABLES = ['ka', 'to', 'ri', 'men', 'sol', 'vex', 'dra', 'pli', 'nor', 'tec',
+             'ana', 'lyt', 'ops', 'dev', 'ux', 'ml', 'data', 'sys', 'net', 'con']
+
+def load_texts(jobs_file, limit):
+    """Title + description of the first limit postings"""
+    texts = []
+    with open(jobs_file, 'rb') as f:
+        for line in f:
+            job = loads(line)
+            texts.append(f"{job.get('title', '')} {job.get('description', '')}")
+            if len(texts) >= limit:
+                break
+    return texts
+
+def synthetic_taxonomy(base, num_skills, aliases_per_skill, text_words, seed=0):
+    """The base dictionary plus synthetic skills up to num_skills
+
+    Multi-word aliases often start with a word from the postings ("data
+    vexanor"), so lookups also walk prefixes that fail part way, as they do
+    with real taxonomies; whole aliases rarely occur in the text, which keeps
+    the number of skills found per posting close to the base dictionary's.
+    """
+    rng = random.Random(seed)
+    pseudo_words = [''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(20_000)]
+
+    def alias():
+        length = rng.choice([1, 2, 2, 3])
+        words = rng.choices(pseudo_words, k=length)
+        if length > 1 and rng.random() < 0.5:
+            words[0] = rng.choice(text_words)
+        return ' '.join(words)
+
+    taxonomy = dict(base)
+    while len(taxonomy) < num_skills:
+        taxonomy[f"Skill {len(taxonomy)}"] = [alias() for _ in range(aliases_per_skill)]
+    return taxonomy
+
+def run(jobs_file, dict_path, sizes, aliases_per_skill, postings, fuzzy=False):
+    with open(dict_path) as f:
+        base = json.load(f)
+    texts = load_texts(jobs_file, postings)
+    total_chars = sum(len(text) for text in texts)
+    text_words = sorted(set(re.findall(r'[a-z]{3,}', ' '.join(texts).lower())))
+    print(f"📚 {len(texts):,} postings, {total_chars / 1e6:.1f} MB of text\n")
+    print(f"{'skills':>8} {'aliases':>9} {'engine':>7} {'build s':>8} {'cached s':>9} "
+          f"{'MB/s':>6} {'skills/job':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            taxonomy = synthetic_taxonomy(base, size, aliases_per_skill, text_words)
+            path = os.path.join(tmp, f"taxonomy-{size}.json")
+            with open(path, 'w') as f:
+                json.dump(taxonomy, f)
+
+            start = time.perf_counter()
+            matcher = SkillMatcher.load(path, cache_dir=None, fuzzy=fuzzy)
+            build = time.perf_counter() - start
+            SkillMatcher.load(path, cache_dir=tmp, fuzzy=fuzzy)  # Fill the cache
+            start = time.perf_counter()
+            matcher = SkillMatcher.load(path, cache_dir=tmp, fuzzy=fuzzy)
+            cached = time.perf_counter() - start
+
+            start = time.perf_counter()
+            found = sum(len(matcher.extract(text)) for text in texts)
+            elapsed = time.perf_counter() - start
+
+            engine = 'regex' if matcher._pattern is not None else 'tokens'
+            aliases = sum(len(aliases) for aliases in taxonomy.values())
+            print(f"{len(taxonomy):>8,} {aliases:>9,} {engine:>7} {build:>8.2f} {cached:>9.2f} "
+                  f"{total_chars / elapsed / 1e6:>6.1f} {found / len(texts):>10.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark skill extraction against dictionary size")
+    parser.add_argument('jobs_file', nargs='?', default='skills-data/kaggle-1k-expanded.jsonl')
+    parser.add_argument('--skills-dict', default='skills-data/skills-dictionary.json')
+    parser.add_argument('--sizes', default='70,300,1000,5000,20000,50000',
+                        help="Comma-separated dictionary sizes in skills")
+    parser.add_argument('--aliases-per-skill', type=int, default=6)
+    parser.add_argument('--postings', type=int, default=1000,
+                        help="Number of postings to match at each size (default: 1000)")
+    parser.add_argument('--fuzzy', action='store_true', help="Benchmark fuzzy matchers")
+    args = parser.parse_args()
+
+    run(args.jobs_file, args.skills_dict, [int(size) for size in args.sizes.split(',')],
+        args.aliases_per_skill, args.postings, args.fuzzy)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Compaction for the processed Parquet partitions
+Every ETL upload adds another part file to its dt= partition and Athena
+slows down as partitions fill up with small files. This merges the files of
+each partition into files of about --target-mb, keeps only the latest record
+per id, and then replaces the originals with the merged files.
+
+The replacement is not atomic. The merged files are published one at a time
+(a copy and delete each on S3) before the originals are deleted, and in that
+window Athena queries on the partition read both old and merged rows, so the
+postings being compacted count twice in:
+  - AthenaHelper.get_job_stats: avg_skills (total_jobs and jobs_with_skills
+    count distinct ids and are unaffected)
+  - dashboard/app.py: get_all_jobs_with_skills and everything built on it
+    (co-occurrence, job matching, seniority stats), get_skills_for_job_title
+    and get_common_job_titles
+  - advanced_analytics.py: get_skill_cooccurrence
+AthenaHelper.get_top_skills counts distinct ids and is unaffected. Run it
+when readers can tolerate that, e.g. outside dashboard hours. An atomic
+switch (ALTER TABLE ... SET LOCATION) does not fit, because the ETL keeps
+appending to dt=<date>/, and symlink manifests cannot be read by the
+table's Parquet input format.
+"""
+import argparse
+import math
+import uuid
+from dataclasses import dataclass
+
+from parquet_writer import DEFAULT_COMPRESSION, DEFAULT_ROW_GROUP_SIZE, part_key, write_data_version
+from storage import open_storage
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DEFAULT_TARGET_MB = 128
+STAGING_PREFIX = '.compact-'  # Athena skips files starting with '.' or '_'
+
+def _is_part_file(key):
+    name = key.rsplit('/', 1)[-1]
+    return name.endswith('.parquet') and not name.startswith(('.', '_'))
+
+def list_partitions(storage, dts=None):
+    """{'dt=YYYY-MM-DD': [(key, size)]} of the visible part files per partition"""
+    partitions = {}
+    for key, size in storage.list():
+        partition, _, rest = key.partition('/')
+        if not partition.startswith('dt=') or not rest:
+            continue
+        if dts and partition[len('dt='):] not in dts:
+            continue
+        files = partitions.setdefault(partition, [])
+        if _is_part_file(key):
+            files.append((key, size))
+    return partitions
+
+def _read_table(storage, keys, columns=None):
+    """Concatenate the part files in key order, unifying older schemas"""
+    tables = []
+    for key in keys:
+        with storage.open_reader(key) as f:
+            parquet_file = pq.ParquetFile(f)
+            names = parquet_file.schema_arrow.names
+            tables.append(parquet_file.read(
+                columns=None if columns is None else [c for c in columns if c in names]
+            ))
+    return pa.concat_tables(tables, promote_options='permissive')
+
+def latest_row_indices(table):
+    """Row indices to keep: one row per id, the newest processed_at winning
+
+    Ties go to the later row, i.e. the later part file. Rows without an id
+    cannot be matched and are all kept.
+    """
+    ids = table.column('id').to_pylist()
+    if 'processed_at' in table.column_names:
+        processed_at = table.column('processed_at').to_pylist()
+    else:
+        processed_at = [None] * len(ids)
+
+    latest = {}
+    unmatched = []
+    for index, (job_id, ts) in enumerate(zip(ids, processed_at)):
+        if job_id is None:
+            unmatched.append(index)
+            continue
+        ts = ts or ''
+        best = latest.get(job_id)
+        if best is None or ts >= best[1]:
+            latest[job_id] = (index, ts)
+    return sorted(unmatched + [index for index, _ in latest.values()])
+
+@dataclass
+class PartitionPlan:
+    partition: str
+    files: list        # (key, size) of the part files read
+    rows: int
+    kept_rows: int
+    output_files: int
+
+    @property
+    def input_bytes(self):
+        return sum(size for _, size in self.files)
+
+    @property
+    def estimated_bytes(self):
+        """Output size, assuming bytes per row stays the same"""
+        return round(self.input_bytes * self.kept_rows / self.rows) if self.rows else 0
+
+    @property
+    def worthwhile(self):
+        return self.output_files < len(self.files) or self.kept_rows < self.rows
+
+def plan_partition(storage, partition, files, target_bytes):
+    """Size up a partition from its id/processed_at columns only"""
+    table = _read_table(storage, [key for key, _ in files], columns=['id', 'processed_at'])
+    plan = PartitionPlan(partition, files, table.num_rows, len(latest_row_indices(table)), 0)
+    plan.output_files = max(1, math.ceil(plan.estimated_bytes / target_bytes))
+    return plan
+
+def compact_partition(storage, plan, row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                      compression=DEFAULT_COMPRESSION):
+    """Merge and dedup a partition, then publish the result; returns the new keys
+
+    The merged files are first written under hidden names, so nothing is
+    visible until every one of them is complete. They are then renamed into
+    place and only afterwards are the inputs deleted, so until the last
+    delete, concurrent readers see the partition's rows twice (see the
+    module docstring). An interrupted run leaves duplicate rows behind,
+    which the next compaction removes. Part files that arrive while
+    compacting are left alone.
+    """
+    table = _read_table(storage, [key for key, _ in plan.files])
+    table = table.take(pa.array(latest_row_indices(table), pa.int64()))
+    rows_per_file = math.ceil(table.num_rows / plan.output_files) if table.num_rows else 0
+
+    run_id = uuid.uuid4().hex[:8]
+    staged = []
+    try:
+        for n in range(plan.output_files if table.num_rows else 0):
+            key = f"{plan.partition}/{STAGING_PREFIX}{run_id}-{n:05d}.parquet"
+            sink = storage.open_writer(key, atomic=True)
+            try:
+                pq.write_table(table.slice(n * rows_per_file, rows_per_file), sink,
+                               row_group_size=row_group_size, compression=compression)
+            except BaseException:
+                sink.abort()
+                raise
+            sink.close()
+            staged.append(key)
+    except BaseException:
+        storage.delete(staged)
+        raise
+
+    dt = plan.partition[len('dt='):]
+    published = []
+    for key in staged:
+        new_key = part_key(dt)
+        storage.rename(key, new_key)
+        published.append(new_key)
+    storage.delete([key for key, _ in plan.files])
+    return published
+
+def _remove_stale_staging(storage, partition):
+    """Drop hidden files left behind by an interrupted compaction"""
+    stale = [key for key, _ in storage.list(partition + '/')
+             if key.rsplit('/', 1)[-1].startswith(STAGING_PREFIX)]
+    if stale:
+        storage.delete(stale)
+    return len(stale)
+
+def _mb(size):
+    return f"{size / 1e6:,.1f} MB"
+
+def compact(location, dts=None, target_mb=DEFAULT_TARGET_MB, dry_run=False,
+            row_group_size=DEFAULT_ROW_GROUP_SIZE, compression=DEFAULT_COMPRESSION,
+            s3_endpoint_url=None, s3_local_root=None):
+    """Compact every dt= partition under location (or just dts); returns the plans
+
+    Run one compaction at a time per location: each run clears hidden files
+    left by earlier, interrupted runs.
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required for compaction (pip install pyarrow)")
+
+    storage = open_storage(location, s3_endpoint_url, s3_local_root)
+    target_bytes = target_mb * 1024 * 1024
+    print(f"🗜️  Compacting {location}{' (dry run)' if dry_run else ''}...")
+    if not dry_run:
+        print("   ⚠️  Queries on a partition see duplicate rows while its files are replaced")
+
+    plans = []
+    for partition, files in sorted(list_partitions(storage, dts).items()):
+        if not dry_run:
+            stale = _remove_stale_staging(storage, partition)
+            if stale:
+                print(f"   {partition}: removed {stale} leftover staging file{'s' if stale != 1 else ''}")
+        if not files:
+            continue
+
+        plan = plan_partition(storage, partition, files, target_bytes)
+        if not plan.worthwhile:
+            print(f"   {partition}: {len(files)} file{'s' if len(files) != 1 else ''}, already compact")
+            continue
+        plans.append(plan)
+        print(f"   {partition}: {len(files)} files, {_mb(plan.input_bytes)}, {plan.rows:,} rows"
+              f" → {plan.output_files} file{'s' if plan.output_files != 1 else ''},"
+              f" ~{_mb(plan.estimated_bytes)}, {plan.kept_rows:,} rows"
+              f" ({plan.rows - plan.kept_rows:,} duplicates)")
+        if not dry_run:
+            compact_partition(storage, plan, row_group_size, compression)
+            write_data_version(storage)  # Duplicates were dropped
+
+    files_before = sum(len(plan.files) for plan in plans)
+    files_after = sum(plan.output_files for plan in plans)
+    bytes_saved = sum(plan.input_bytes - plan.estimated_bytes for plan in plans)
+    print(f"\n📊 {len(plans)} partition{'s' if len(plans) != 1 else ''} to compact: "
+          f"{files_before} → {files_after} files, saving {files_before - files_after} files"
+          f" and ~{_mb(bytes_saved)}")
+    if plans and not dry_run:
+        print("✅ Compaction complete")
+    return plans
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Compact the processed Parquet partitions. Not atomic: while a partition's "
+                    "files are replaced, Athena queries on it can see its rows twice.")
+    parser.add_argument('location', nargs='?', default='skills-data/processed',
+                        help="Directory or s3://bucket/prefix holding the dt= partitions")
+    parser.add_argument('--dt', action='append', default=None,
+                        help="Only compact this partition date (repeatable)")
+    parser.add_argument('--target-mb', type=int, default=DEFAULT_TARGET_MB,
+                        help="Approximate size of each compacted file (default: 128)")
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    parser.add_argument('--compression', default=DEFAULT_COMPRESSION,
+                        help="Parquet codec: snappy, zstd, gzip, none (default: snappy)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only report file-count and byte savings")
+    parser.add_argument('--s3-endpoint-url', default=None,
+                        help="Endpoint for s3:// locations on an S3-compatible service")
+    parser.add_argument('--s3-local-root', default=None,
+                        help="Serve s3:// locations from this local directory (offline testing)")
+    args = parser.parse_args()
+
+    compact(args.location, dts=args.dt, target_mb=args.target_mb, dry_run=args.dry_run,
+            row_group_size=args.row_group_size, compression=args.compression,
+            s3_endpoint_url=args.s3_endpoint_url, s3_local_root=args.s3_local_root)
@@ -3,10 +3,23 @@
 ETL Pipeline for Job Skills Analyzer
 Reads raw job postings, cleans and normalizes them, extracts skills
 """
+import argparse
 import json
+import multiprocessing
+import os
 import re
+import time
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from skill_matcher import ExtractionCache, SkillMatcher, as_matcher
+from job_index import JobIndex, content_hash, dictionary_fingerprint, job_key
+from json_codec import BACKEND as JSON_BACKEND, decode_lines, encode_line, encode_lines
+from jsonl_reader import MappedJSONL, DEFAULT_RANGE_BYTES, is_compressed, open_input, skip_bytes
+from near_duplicates import BYTES_PER_POSTING, DEFAULT_WINDOW, NearDuplicateIndex, band_keys, compact_signature, minhash_signature
+from progress import ProgressReporter, StageTimer
+from storage import open_storage, split_location
+from parquet_writer import ParquetJobWriter, DEFAULT_ROW_GROUP_SIZE, DEFAULT_COMPRESSION
 
 def clean_text(text):
     """Remove extra whitespace and normalize text"""
@@ -32,83 +45,597 @@ def normalize_job(job):
     }
 
 def extract_skills(text, skills_dict):
-    """Extract skills from text using dictionary"""
-    text_lower = text.lower()
-    found_skills = []
+    """Extract skills from text using dictionary (or a prebuilt SkillMatcher)"""
+    return as_matcher(skills_dict).extract(text)
+
+def process_record(raw_job, matcher, timings=None):
+    """Normalize one raw posting and attach its extracted skills
+    
+    If timings is a dict, seconds spent are added under 'normalize' and 'extract'.
+    """
+    start = time.perf_counter()
+    clean_job = normalize_job(raw_job)
+    normalized = time.perf_counter()
+    
+    # Extract skills
+    full_text = f"{clean_job['title']} {clean_job['description']}"
+    skills = extract_skills(full_text, matcher)
+    
+    if timings is not None:
+        timings['normalize'] += normalized - start
+        timings['extract'] += time.perf_counter() - normalized
     
-    for canonical_skill, aliases in skills_dict.items():
-        for alias in aliases:
-            pattern = r'\b' + re.escape(alias.lower()) + r'\b'
-            if re.search(pattern, text_lower):
-                found_skills.append(canonical_skill)
-                break
+    # Add skills to job
+    clean_job['skills'] = skills
+    clean_job['skill_count'] = len(skills)
+    return clean_job
+
+# Per-process matcher (or ExtractionCache), set by _init_worker or directly for the sequential path
+_worker_matcher = None
+# Per-process memory maps of the input, keyed by path
+_worker_inputs = {}
+
+# Whether workers compute near-duplicate band keys
+_worker_dedup = False
+# JobIndex of already-processed postings in incremental runs
+_worker_index = None
+
+def _init_worker(skills_dict_file, cache_size=0, dedup=False, index_file=None, fingerprint=None,
+                 fuzzy=False):
+    """Pool initializer: load the (cached) matcher, and the job index, once per worker process"""
+    global _worker_matcher, _worker_dedup, _worker_index
+    _worker_matcher = SkillMatcher.load(skills_dict_file, fuzzy=fuzzy)
+    if cache_size:
+        _worker_matcher = ExtractionCache(_worker_matcher, cache_size)
+    _worker_dedup = dedup
+    # Forked workers inherit the parent's globals, so always overwrite them
+    _worker_index = JobIndex.load(index_file, fingerprint) if index_file else None
+
+@dataclass
+class ChunkResult:
+    """What one worker task sends back to the parent"""
+    jobs: list
+    skill_stats: dict
+    errors: list           # (1-based line index within the task, message)
+    line_count: int
+    timings: dict
+    cache_hits: int = 0
+    cache_misses: int = 0
+    band_keys: list = None  # LSH band keys per job when dedup is on
+    signatures: list = None  # Compact MinHash signature per job when dedup is on
+    index_entries: list = None  # (job key or None, content hash) per job in incremental runs
+    unchanged: int = 0  # Postings skipped because the index already has them
+
+def _process_lines(lines):
+    """Parse and process a list of raw JSON lines into a ChunkResult"""
+    cache = _worker_matcher if isinstance(_worker_matcher, ExtractionCache) else None
+    hits_before, misses_before = (cache.hits, cache.misses) if cache else (0, 0)
+    jobs = []
+    skill_stats = defaultdict(int)
+    timings = defaultdict(float)
+    keys = [] if _worker_dedup else None
+    signatures = [] if _worker_dedup else None
+    start = time.perf_counter()
+    raw_jobs, errors = decode_lines(lines)
+    timings['parse'] += time.perf_counter() - start
+    
+    entries = None
+    unchanged = 0
+    if _worker_index is not None:
+        # Skip postings whose content matches the index; the parent records the rest
+        start = time.perf_counter()
+        entries = []
+        changed = []
+        for raw_job in raw_jobs:
+            key = job_key(raw_job['id']) if raw_job.get('id') else None
+            content = content_hash(raw_job)
+            if key is not None and _worker_index.get(key) == content:
+                unchanged += 1
+                continue
+            entries.append((key, content))
+            changed.append(raw_job)
+        raw_jobs = changed
+        timings['index'] += time.perf_counter() - start
+    
+    for raw_job in raw_jobs:
+        clean_job = process_record(raw_job, _worker_matcher, timings)
+        jobs.append(clean_job)
+        for skill in clean_job['skills']:
+            skill_stats[skill] += 1
+        
+        if keys is not None:
+            start = time.perf_counter()
+            signature = minhash_signature(clean_job['description'])
+            keys.append(band_keys(signature) if signature else None)
+            signatures.append(compact_signature(signature) if signature else None)
+            timings['minhash'] += time.perf_counter() - start
+    
+    result = ChunkResult(jobs, skill_stats, errors, len(lines), timings, band_keys=keys,
+                         signatures=signatures, index_entries=entries, unchanged=unchanged)
+    if cache:
+        result.cache_hits = cache.hits - hits_before
+        result.cache_misses = cache.misses - misses_before
+    return result
+
+def _process_task(task):
+    """Worker entry point: task is a list of lines or an (input_path, start, end) byte range"""
+    if isinstance(task, list):
+        return _process_lines(task)
     
-    return found_skills
+    # Each worker maps the input itself and reads only its own range
+    path, start, end = task
+    reader = _worker_inputs.get(path)
+    if reader is None:
+        reader = _worker_inputs[path] = MappedJSONL(path)
+    return _process_lines(list(reader.lines(start, end)))
 
-def process_jobs(raw_jobs_file, skills_dict_file, output_file):
-    """Main ETL process"""
+def _read_chunks(f, chunk_size, start_offset=0):
+    """Group lines of a binary file into lists of chunk_size
     
+    Yields (end_offset, chunk) where end_offset is the input byte offset just
+    past the chunk's last line, so a run can resume there.
+    """
+    chunk = []
+    offset = start_offset
+    for line in f:
+        offset += len(line)
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield offset, chunk
+            chunk = []
+    if chunk:
+        yield offset, chunk
+
+def _read_ranges(reader, range_bytes, start_offset=0):
+    """Yield (end_offset, (path, start, end)) tasks covering the mapped input"""
+    for start, end in reader.split(range_bytes, start_offset):
+        yield end, (reader.path, start, end)
+
+def _iter_results(tasks, matcher, skills_dict_file, workers, cache_size=0, dedup=False,
+                  index=None, index_file=None, fuzzy=False):
+    """Yield (end_offset, _process_task result) in input order, in-process or from a pool
+    
+    At most 2 * workers tasks are in flight, so memory stays bounded no matter
+    how large the input is (Pool.imap would read the whole input ahead).
+    Pool workers map the job index from index_file, sharing its pages.
+    """
+    global _worker_matcher, _worker_dedup, _worker_index
+    if workers <= 1:
+        _worker_matcher = ExtractionCache(matcher, cache_size) if cache_size else matcher
+        _worker_dedup = dedup
+        _worker_index = index
+        try:
+            for end_offset, task in tasks:
+                yield end_offset, _process_task(task)
+        finally:
+            # Later pools fork from this process and would inherit them
+            _worker_matcher, _worker_dedup, _worker_index = None, False, None
+        return
+    
+    fingerprint = index.fingerprint if index is not None else None
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(skills_dict_file, cache_size, dedup,
+                                        index_file, fingerprint, fuzzy)) as pool:
+        pending = deque()
+        for end_offset, task in tasks:
+            pending.append((end_offset, pool.apply_async(_process_task, (task,))))
+            if len(pending) >= 2 * workers:
+                end_offset, result = pending.popleft()
+                yield end_offset, result.get()
+        while pending:
+            end_offset, result = pending.popleft()
+            yield end_offset, result.get()
+
+def _apply_changes(index, summary, result):
+    """Count a task's postings as inserted/updated/unchanged and record their hashes
+    
+    Workers compare against the index as it was loaded, so a posting repeated
+    later in the same run with the same content is dropped here (a repeat
+    that reverts to the indexed content is skipped by its worker and picked
+    up by the next run). Returns the jobs to write.
+    """
+    summary.unchanged += result.unchanged
+    keep = []
+    for position, (job, (key, content)) in enumerate(zip(result.jobs, result.index_entries)):
+        if key is None:
+            summary.inserted += 1
+        else:
+            previous = index.get(key)
+            if previous == content:
+                summary.unchanged += 1
+                for skill in job['skills']:
+                    result.skill_stats[skill] -= 1
+                    if not result.skill_stats[skill]:
+                        del result.skill_stats[skill]
+                continue
+            if previous is None:
+                summary.inserted += 1
+            else:
+                summary.updated += 1
+            index.set(key, content)
+        keep.append(position)
+    
+    if len(keep) < len(result.jobs):
+        result.jobs = [result.jobs[i] for i in keep]
+        if result.band_keys is not None:
+            result.band_keys = [result.band_keys[i] for i in keep]
+            result.signatures = [result.signatures[i] for i in keep]
+    return result.jobs
+
+def _checkpoint_path(output_file):
+    return output_file + '.checkpoint'
+
+def _write_checkpoint(output_file, checkpoint):
+    """Atomically replace the checkpoint file next to output_file"""
+    path = _checkpoint_path(output_file)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _load_checkpoint(raw_jobs_file, output_file):
+    """Return the checkpoint for this input/output pair, or None"""
+    path = _checkpoint_path(output_file)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        checkpoint = json.load(f)
+    if checkpoint['input_file'] != os.path.abspath(raw_jobs_file):
+        raise ValueError(f"Checkpoint {path} belongs to {checkpoint['input_file']}, not {raw_jobs_file}")
+    if checkpoint['input_size'] > os.path.getsize(raw_jobs_file):
+        raise ValueError(f"Input {raw_jobs_file} is smaller than when checkpoint {path} was written")
+    return checkpoint
+
+@dataclass
+class ETLSummary:
+    """Totals returned by a streaming process_jobs run"""
+    output_file: str
+    jobs_processed: int = 0
+    errors: int = 0
+    skill_stats: dict = field(default_factory=lambda: defaultdict(int))
+    resumed_from_line: int = 0
+    elapsed_seconds: float = 0.0
+    stage_seconds: dict = field(default_factory=dict)
+    cache_hits: int = 0
+    cache_misses: int = 0
+    duplicates: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+def print_summary(summary, report, show_cache=False, show_dedup=False, show_changes=False):
+    """Print the end-of-run totals, top skills and stage timing report"""
+    skill_stats = summary.skill_stats
+    print(f"\n✅ ETL Complete!")
+    print(f"   Jobs processed: {summary.jobs_processed}")
+    print(f"   Unique skills found: {len(skill_stats)}")
+    print(f"   Output: {summary.output_file}")
+    if show_cache:
+        lookups = summary.cache_hits + summary.cache_misses
+        hit_rate = summary.cache_hits / lookups * 100 if lookups else 0.0
+        print(f"   Extraction cache: {summary.cache_hits:,} hits / {lookups:,} lookups ({hit_rate:.1f}%)")
+    if show_dedup:
+        print(f"   Near-duplicates: {summary.duplicates:,}")
+    if show_changes:
+        print(f"   Changeset: {summary.inserted:,} inserted, {summary.updated:,} updated, "
+              f"{summary.unchanged:,} unchanged")
+    
+    print(f"\n📈 Top 10 Skills:")
+    for skill, count in sorted(skill_stats.items(), key=lambda x: x[1], reverse=True)[:10]:
+        percentage = (count / summary.jobs_processed) * 100
+        print(f"   {skill:20s}: {count:2d} jobs ({percentage:5.1f}%)")
+    
+    print(f"\n⏱️  Stage timings: {report}")
+
+def process_jobs(raw_jobs_file, skills_dict_file, output_file, workers=1, chunk_size=1000, stream=False,
+                 resume=False, checkpoint_interval=30.0, output_format='jsonl', dt=None,
+                 range_bytes=DEFAULT_RANGE_BYTES, progress_interval=2.0, timings_file=None,
+                 cache_size=0, dedup=False, s3_endpoint_url=None, s3_local_root=None,
+                 row_group_size=DEFAULT_ROW_GROUP_SIZE, compression=DEFAULT_COMPRESSION,
+                 index_file=None, fuzzy=False, dedup_window=DEFAULT_WINDOW):
+    """Main ETL process
+
+    Returns (processed_jobs, skill_stats), or an ETLSummary when streaming.
+    Options mirror the command-line flags below.
+    """
+    if output_format not in ('jsonl', 'parquet'):
+        raise ValueError(f"Unknown output format: {output_format}")
+    if resume and output_format != 'jsonl':
+        raise ValueError("--resume is only supported for JSON lines output")
+    stream = stream or resume
+    
+    if output_format == 'parquet':
+        storage = open_storage(output_file, s3_endpoint_url, s3_local_root)
+        output_key = None
+    else:
+        output_dir, output_key = split_location(output_file)
+        storage = open_storage(output_dir, s3_endpoint_url, s3_local_root)
+    if resume and not storage.supports_resume:
+        raise ValueError("--resume needs a local output file")
+    if resume and index_file:
+        raise ValueError("--resume cannot be combined with an incremental --index")
+    checkpointing = stream and storage.supports_resume and output_format == 'jsonl'
+
     # Load skills dictionary
     print("📚 Loading skills dictionary...")
-    with open(skills_dict_file, 'r') as f:
-        skills_dict = json.load(f)
-    print(f"   Loaded {len(skills_dict)} skills")
+    matcher = SkillMatcher.load(skills_dict_file, fuzzy=fuzzy)
+    print(f"   Loaded {len(matcher.skills)} skills{' (fuzzy matching)' if fuzzy else ''}")
+    
+    index = None
+    if index_file:
+        index = JobIndex.load(index_file, dictionary_fingerprint(skills_dict_file, fuzzy))
+        if len(index):
+            print(f"   Incremental run against {len(index):,} indexed jobs")
+        else:
+            print("   Incremental run with an empty index (first run or new skills dictionary)")
     
     # Process jobs
-    print("\n📊 Processing jobs...")
+    print(f"\n📊 Processing jobs ({workers} worker{'s' if workers != 1 else ''})...")
     processed_jobs = []
-    skill_stats = defaultdict(int)
+    summary = ETLSummary(output_file=output_file)
+    skill_stats = summary.skill_stats
     
-    with open(raw_jobs_file, 'r') as f:
-        for line_num, line in enumerate(f, 1):
-            try:
-                raw_job = json.loads(line)
-                
-                # Normalize job
-                clean_job = normalize_job(raw_job)
+    checkpoint = _load_checkpoint(raw_jobs_file, output_file) if resume else None
+    if checkpoint:
+        summary.jobs_processed = checkpoint['jobs_processed']
+        summary.errors = checkpoint['errors']
+        summary.resumed_from_line = checkpoint['line_num']
+        skill_stats.update(checkpoint['skill_stats'])
+        print(f"   ↻ Resuming after line {checkpoint['line_num']:,} "
+              f"({checkpoint['jobs_processed']:,} jobs already written)")
+    elif resume:
+        print("   No checkpoint found, starting from the beginning")
+    
+    out = None
+    parquet_writer = None
+    if output_format == 'parquet':
+        parquet_writer = ParquetJobWriter(storage, dt, row_group_size, compression)
+        summary.output_file = parquet_writer.path
+    elif checkpoint:
+        # Drop anything written after the last checkpoint
+        out = storage.open_writer(output_key, append_at=checkpoint['output_offset'])
+    elif stream:
+        out = storage.open_writer(output_key)
+        # A checkpoint from an earlier run would point into the file just truncated
+        if checkpointing and os.path.exists(_checkpoint_path(output_file)):
+            os.remove(_checkpoint_path(output_file))
+    last_checkpoint = time.monotonic()
+    
+    lines_done = start_offset = 0
+    if checkpoint:
+        lines_done, start_offset = checkpoint['line_num'], checkpoint['input_offset']
+    
+    reader = None
+    dedup_index = NearDuplicateIndex(window=dedup_window) if dedup else None
+    if dedup and dedup_window > DEFAULT_WINDOW:
+        print(f"⚠️  Dedup window of {dedup_window:,} postings may use ~{dedup_window * BYTES_PER_POSTING / 1e6:,.0f} MB")
+    timer = StageTimer()
+    progress = ProgressReporter(
+        total_bytes=None if is_compressed(raw_jobs_file) else os.path.getsize(raw_jobs_file),
+        interval=progress_interval,
+        start_bytes=start_offset
+    )
+    try:
+        with open_input(raw_jobs_file) as f:
+            if workers > 1 and not is_compressed(raw_jobs_file):
+                # Workers read their own newline-aligned byte ranges of the mapped input
+                reader = MappedJSONL(raw_jobs_file)
+                tasks = _read_ranges(reader, range_bytes, start_offset)
+            else:
+                # Compressed input is decompressed here and shipped to workers in line chunks
+                skip_bytes(f, start_offset)
+                tasks = _read_chunks(f, chunk_size, start_offset)
+            for end_offset, result in _iter_results(
+                    tasks, matcher, skills_dict_file, workers, cache_size, dedup, index, index_file,
+                    fuzzy):
+                jobs = result.jobs
+                for line_index, error in result.errors:
+                    print(f"   ✗ Error on line {lines_done + line_index}: {error}")
+                lines_done += result.line_count
+                timer.merge(result.timings)
+                summary.cache_hits += result.cache_hits
+                summary.cache_misses += result.cache_misses
                 
-                # Extract skills
-                full_text = f"{clean_job['title']} {clean_job['description']}"
-                skills = extract_skills(full_text, skills_dict)
+                if index is not None:
+                    jobs = _apply_changes(index, summary, result)
                 
-                # Add skills to job
-                clean_job['skills'] = skills
-                clean_job['skill_count'] = len(skills)
+                if dedup_index is not None:
+                    dedup_start = time.perf_counter()
+                    for job, keys, signature in zip(jobs, result.band_keys, result.signatures):
+                        job['duplicate_of'] = dedup_index.assign(job['job_id'], keys, signature)
+                    timer.add('dedup', time.perf_counter() - dedup_start)
                 
-                processed_jobs.append(clean_job)
+                write_start = time.perf_counter()
+                if parquet_writer is not None:
+                    parquet_writer.write(jobs)
+                elif stream:
+                    out.write(encode_lines(jobs))
+                if not stream:
+                    processed_jobs.extend(jobs)
+                timer.add('write', time.perf_counter() - write_start)
+                progress.update(len(jobs) + result.unchanged, end_offset)
+                summary.jobs_processed += len(jobs)
+                summary.errors += len(result.errors)
                 
                 # Update stats
-                for skill in skills:
-                    skill_stats[skill] += 1
-                
-                print(f"   ✓ Processed: {clean_job['title']} ({len(skills)} skills)")
+                for skill, count in result.skill_stats.items():
+                    skill_stats[skill] += count
                 
-            except json.JSONDecodeError as e:
-                print(f"   ✗ Error on line {line_num}: {e}")
-                continue
+                if checkpointing and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                    # Output must be durable before the checkpoint that points past it
+                    out.flush()
+                    os.fsync(out.fileno())
+                    _write_checkpoint(output_file, {
+                        'input_file': os.path.abspath(raw_jobs_file),
+                        'input_size': os.path.getsize(raw_jobs_file),
+                        'input_offset': end_offset,
+                        'line_num': lines_done,
+                        'output_offset': out.tell(),
+                        'jobs_processed': summary.jobs_processed,
+                        'errors': summary.errors,
+                        'skill_stats': skill_stats,
+                        'written_at': datetime.now().isoformat()
+                    })
+                    last_checkpoint = time.monotonic()
+    except BaseException:
+        # Local JSONL keeps what was written for --resume; atomic outputs are discarded
+        if parquet_writer is not None:
+            parquet_writer.abort()
+        if out is not None:
+            out.abort()
+        raise
+    finally:
+        if reader is not None:
+            reader.close()
     
-    # Save processed jobs
-    print(f"\n💾 Saving {len(processed_jobs)} processed jobs...")
-    with open(output_file, 'w') as f:
-        for job in processed_jobs:
-            f.write(json.dumps(job) + '\n')
+    write_start = time.perf_counter()
+    if out is not None:
+        out.close()  # Waits for outstanding S3 part uploads
+    if checkpointing and os.path.exists(_checkpoint_path(output_file)):
+        os.remove(_checkpoint_path(output_file))
     
-    # Print summary
-    print(f"\n✅ ETL Complete!")
-    print(f"   Jobs processed: {len(processed_jobs)}")
-    print(f"   Unique skills found: {len(skill_stats)}")
-    print(f"   Output: {output_file}")
+    if parquet_writer is not None:
+        print(f"\n💾 Writing {parquet_writer.dt} partition...")
+        parquet_writer.close()
+    elif not stream:
+        # Save processed jobs
+        print(f"\n💾 Saving {len(processed_jobs)} processed jobs...")
+        out = storage.open_writer(output_key)
+        try:
+            out.writelines(map(encode_line, processed_jobs))
+        except BaseException:
+            out.abort()
+            raise
+        out.close()
+    timer.add('write', time.perf_counter() - write_start)
     
-    print(f"\n📈 Top 10 Skills:")
-    for skill, count in sorted(skill_stats.items(), key=lambda x: x[1], reverse=True)[:10]:
-        percentage = (count / len(processed_jobs)) * 100
-        print(f"   {skill:20s}: {count:2d} jobs ({percentage:5.1f}%)")
+    if index is not None:
+        # Only now is the changeset safely written
+        index_start = time.perf_counter()
+        index.save(index_file)
+        timer.add('index', time.perf_counter() - index_start)
+    
+    if dedup_index is not None:
+        summary.duplicates = dedup_index.duplicates
+    summary.elapsed_seconds = progress.finish()
+    summary.stage_seconds = dict(timer.seconds)
+    extra = {}
+    if fuzzy:
+        extra['fuzzy'] = True
+    if index is not None:
+        extra['changeset'] = {'inserted': summary.inserted, 'updated': summary.updated,
+                              'unchanged': summary.unchanged}
+    report = timer.report(summary.elapsed_seconds, rows=summary.jobs_processed,
+                          input_bytes=progress.bytes_done - start_offset, workers=workers,
+                          cache_hits=summary.cache_hits, cache_misses=summary.cache_misses,
+                          json_codec=JSON_BACKEND, **extra)
+    if timings_file:
+        with open(timings_file, 'w') as f:
+            f.write(report + '\n')
     
+    print_summary(summary, report, show_cache=bool(cache_size), show_dedup=dedup,
+                  show_changes=index is not None)
+    
+    if stream:
+        return summary
     return processed_jobs, skill_stats
 
 if __name__ == '__main__':
-    process_jobs(
-        'skills-data/all-jobs.json',
-        'skills-data/skills-dictionary.json',
-        'skills-data/processed-jobs.json'
-    )
+    parser = argparse.ArgumentParser(description="Job Skills Analyzer ETL")
+    parser.add_argument('raw_jobs_file', nargs='?', default='skills-data/all-jobs.json')
+    parser.add_argument('--skills-dict', default='skills-data/skills-dictionary.json')
+    parser.add_argument('--output', default=None,
+                        help="Output file (jsonl) or processed/ root directory (parquet); local path or s3://bucket/key, uploaded in parts while processing and only visible once the run succeeds")
+    parser.add_argument('--format', dest='output_format', choices=['jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--dt', default=None, help="Partition date for Parquet output (default: today)")
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                        help="Rows per Parquet row group")
+    parser.add_argument('--compression', default=DEFAULT_COMPRESSION,
+                        help="Parquet codec: snappy, zstd, gzip, none (default: snappy)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes for normalize + extraction (default: 1)")
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help="Input lines per chunk when running sequentially or reading .gz/.zst input (default: 1000)")
+    parser.add_argument('--range-bytes', type=int, default=DEFAULT_RANGE_BYTES,
+                        help="Newline-aligned bytes of the memory-mapped input per worker task with --workers > 1 (default: 4 MiB)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write records as they are produced instead of buffering the whole run, checkpointing to <output>.checkpoint (JSON lines, local output only)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue a streaming run from its last checkpoint, writing every record exactly once (implies --stream)")
+    parser.add_argument('--checkpoint-interval', type=float, default=30.0,
+                        help="Seconds between checkpoints in streaming mode (default: 30)")
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help="Per-process LRU of extraction results keyed by normalized title + description, so identical reposts skip the matcher (default: off)")
+    parser.add_argument('--dedup', action='store_true',
+                        help="Mark near-duplicate postings in a duplicate_of column: the first earlier posting of this run sharing an LSH bucket at estimated Jaccard >= 0.8 (COALESCE(duplicate_of, id) is the cluster id)")
+    parser.add_argument('--dedup-window', type=int, default=DEFAULT_WINDOW,
+                        help="Recent postings --dedup compares against, ~850 bytes of memory each (default: 200,000, ~170 MB)")
+    parser.add_argument('--s3-endpoint-url', default=None,
+                        help="Endpoint for s3:// outputs on an S3-compatible service")
+    parser.add_argument('--s3-local-root', default=None,
+                        help="Store s3:// outputs under this local directory (offline testing)")
+    parser.add_argument('--progress-interval', type=float, default=2.0,
+                        help="Seconds between progress lines (default: 2)")
+    parser.add_argument('--timings-file', default=None,
+                        help="Also write the JSON stage timing report (parse, normalize, extract, write; summed over workers) to this file")
+    parser.add_argument('--index', dest='index_file', default=None,
+                        help="Incremental run: only process postings new or changed since this job index and write them as a changeset; the index is updated after the output and rebuilt when the dictionary or --fuzzy changes")
+    parser.add_argument('--fuzzy', action='store_true',
+                        help="Also match misspelled skill aliases (edit distance 1-2 on longer aliases) through a cached fuzzy index")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Run as a staged asyncio pipeline with bounded queues (streams output)")
+    parser.add_argument('--queue-size', type=int, default=8,
+                        help="Batches of --chunk-size lines each pipeline queue may hold (default: 8)")
+    args = parser.parse_args()
+    if args.output is None:
+        args.output = 'skills-data/processed' if args.output_format == 'parquet' else 'skills-data/processed-jobs.json'
+    if args.pipeline and (args.resume or args.dedup or args.index_file):
+        parser.error("--pipeline does not support --resume, --dedup or --index")
+
+    if args.pipeline:
+        from async_pipeline import run_pipeline
+        run_pipeline(
+            args.raw_jobs_file,
+            args.skills_dict,
+            args.output,
+            workers=args.workers,
+            batch_size=args.chunk_size,
+            queue_size=args.queue_size,
+            output_format=args.output_format,
+            dt=args.dt,
+            row_group_size=args.row_group_size,
+            compression=args.compression,
+            cache_size=args.cache_size,
+            s3_endpoint_url=args.s3_endpoint_url,
+            s3_local_root=args.s3_local_root,
+            progress_interval=args.progress_interval,
+            timings_file=args.timings_file,
+            fuzzy=args.fuzzy
+        )
+    else:
+        process_jobs(
+            args.raw_jobs_file,
+            args.skills_dict,
+            args.output,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            range_bytes=args.range_bytes,
+            progress_interval=args.progress_interval,
+            timings_file=args.timings_file,
+            cache_size=args.cache_size,
+            dedup=args.dedup,
+            dedup_window=args.dedup_window,
+            s3_endpoint_url=args.s3_endpoint_url,
+            s3_local_root=args.s3_local_root,
+            stream=args.stream,
+            resume=args.resume,
+            checkpoint_interval=args.checkpoint_interval,
+            output_format=args.output_format,
+            dt=args.dt,
+            row_group_size=args.row_group_size,
+            compression=args.compression,
+            index_file=args.index_file,
+            fuzzy=args.fuzzy
+        )
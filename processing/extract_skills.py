@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
+import argparse
 import json
-import re
+import os
+import time
 from collections import defaultdict
+from skill_matcher import SkillMatcher, as_matcher
+from json_codec import BACKEND as JSON_BACKEND, encode_line, loads
+from jsonl_reader import is_compressed, open_input
+from progress import ProgressReporter, StageTimer
 
 def load_skills_dictionary(dict_path):
     """Load skills dictionary from JSON file"""
@@ -10,23 +16,28 @@ def load_skills_dictionary(dict_path):
 
 def extract_skills_from_text(text, skills_dict):
     """Extract skills from text using dictionary matching"""
-    text_lower = text.lower()
     found_skills = []
     
-    for canonical_skill, aliases in skills_dict.items():
-        for alias in aliases:
-            # Use word boundaries to avoid partial matches
-            pattern = r'\b' + re.escape(alias.lower()) + r'\b'
-            if re.search(pattern, text_lower):
-                found_skills.append({
-                    'skill': canonical_skill,
-                    'matched_variant': alias,
-                    'confidence': 0.9  # Dictionary match = high confidence
-                })
-                break  # Found this skill, move to next
+    # Single word-bounded scan; first alias in dictionary order wins per skill
+    for canonical_skill, alias, distance in as_matcher(skills_dict).match_with_distance(text):
+        found_skills.append({
+            'skill': canonical_skill,
+            'matched_variant': alias,
+            # Dictionary match = high confidence, lower for each typo corrected
+            'confidence': round(0.9 - 0.15 * distance, 2)
+        })
     
     return found_skills
 
+def extract_skills_batch(texts, skills_dict):
+    """Extract every skill occurrence from a batch of texts as flat BatchMatches columns
+    
+    Rows carry job index, skill id, alias id, start/end offsets and edit
+    distance; counts holds the matches per text. Skill and alias ids index
+    matcher.skills and matcher.alias_text.
+    """
+    return as_matcher(skills_dict).match_batch(texts)
+
 def process_job_posting(job, skills_dict):
     """Process a single job posting and extract skills"""
     # Combine title and description for skill extraction
@@ -44,34 +55,38 @@ def process_job_posting(job, skills_dict):
         'skill_count': len(skills)
     }
 
-def main():
+def main(jobs_file='skills-data/sample-jobs.json', output_file='skills-data/extracted-skills.json',
+         fuzzy=False):
     # Load skills dictionary
     print("Loading skills dictionary...")
-    skills_dict = load_skills_dictionary('skills-data/skills-dictionary.json')
-    print(f"Loaded {len(skills_dict)} canonical skills")
-    
-    # Load job postings
-    print("\nLoading job postings...")
-    jobs = []
-    with open('skills-data/sample-jobs.json', 'r') as f:
-        for line in f:
-            jobs.append(json.loads(line))
-    print(f"Loaded {len(jobs)} job postings")
+    matcher = SkillMatcher.load('skills-data/skills-dictionary.json', fuzzy=fuzzy)
+    print(f"Loaded {len(matcher.skills)} canonical skills{' (fuzzy matching)' if fuzzy else ''}")
     
-    # Process each job
+    # Load job postings and extract skills as they stream in
     print("\nExtracting skills from jobs...")
+    total_bytes = None if is_compressed(jobs_file) else os.path.getsize(jobs_file)
+    progress = ProgressReporter(total_bytes=total_bytes)
+    timer = StageTimer()
     results = []
-    for job in jobs:
-        result = process_job_posting(job, skills_dict)
-        results.append(result)
-        print(f"\n{result['title']} ({result['company']})")
-        print(f"  Found {result['skill_count']} skills: {', '.join([s['skill'] for s in result['skills']])}")
+    bytes_read = 0
+    with open_input(jobs_file) as f:  # .gz / .zst are decompressed on the fly
+        for line in f:
+            start = time.perf_counter()
+            job = loads(line)
+            parsed = time.perf_counter()
+            results.append(process_job_posting(job, matcher))
+            timer.add('parse', parsed - start)
+            timer.add('extract', time.perf_counter() - parsed)
+            bytes_read += len(line)
+            progress.update(1, bytes_read)
+    elapsed = progress.finish()
+    print(f"Processed {len(results)} job postings")
     
     # Save results
-    output_file = 'skills-data/extracted-skills.json'
-    with open(output_file, 'w') as f:
-        for result in results:
-            f.write(json.dumps(result) + '\n')
+    start = time.perf_counter()
+    with open(output_file, 'wb') as f:
+        f.writelines(map(encode_line, results))
+    timer.add('write', time.perf_counter() - start)
     
     print(f"\n✅ Results saved to: {output_file}")
     
@@ -84,6 +99,15 @@ def main():
     print("\n📊 Top Skills Across All Jobs:")
     for skill, count in sorted(all_skills.items(), key=lambda x: x[1], reverse=True)[:10]:
         print(f"  {skill}: {count} jobs")
+    
+    print(f"\n⏱️  Stage timings: {timer.report(elapsed, rows=len(results), input_bytes=bytes_read, json_codec=JSON_BACKEND)}")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Extract skills from job postings")
+    parser.add_argument('jobs_file', nargs='?', default='skills-data/sample-jobs.json',
+                        help="JSONL postings, optionally .gz or .zst compressed")
+    parser.add_argument('--output', default='skills-data/extracted-skills.json')
+    parser.add_argument('--fuzzy', action='store_true',
+                        help="Also match misspelled skill aliases (edit distance 1-2 on longer aliases)")
+    args = parser.parse_args()
+    main(args.jobs_file, args.output, args.fuzzy)
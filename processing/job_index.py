@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Index of already-processed postings for incremental ETL runs
+Maps a 64-bit hash of each job_id to a 64-bit hash of the posting content
+that feeds the output, stored as two sorted uint64 arrays (16 bytes per job)
+so workers can load it quickly and look postings up with a binary search.
+Loaded indexes are memory-mapped, so pool workers share one copy of the
+arrays through the page cache.
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+from array import array
+from bisect import bisect_left
+
+INDEX_MAGIC = b'JOBIDX1\n'
+HEADER_SIZE = len(INDEX_MAGIC) + 32 + 8  # Magic, fingerprint, count; keeps the arrays 8-byte aligned
+# Raw fields normalize_job reads; a change in any of them changes the output
+CONTENT_FIELDS = ('title', 'company', 'location', 'country', 'description', 'posted_date', 'source')
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+def job_key(job_id):
+    """64-bit key for a job_id"""
+    return _hash64(str(job_id).encode('utf-8'))
+
+def content_hash(raw_job):
+    """64-bit hash of the fields of a raw posting that end up in the output"""
+    parts = [str(raw_job.get(name, '')) for name in CONTENT_FIELDS]
+    return _hash64('\x1f'.join(parts).encode('utf-8', 'surrogatepass'))
+
+def dictionary_fingerprint(dict_path, fuzzy=False):
+    """Content hash of the skills dictionary and matching mode; changing either
+    invalidates the index"""
+    with open(dict_path, 'rb') as f:
+        raw = f.read()
+    if fuzzy:
+        raw += b'\0fuzzy'
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+class JobIndex:
+    """job_id -> content hash for every posting processed so far
+
+    Lookups see the loaded snapshot plus anything set() during this run;
+    save() merges the new entries in and atomically replaces the file.
+    """
+
+    def __init__(self, fingerprint, keys=None, hashes=None):
+        """keys and hashes are sorted uint64 sequences: arrays, or memoryviews
+        over a mapped index file"""
+        self.fingerprint = fingerprint
+        self._keys = keys if keys is not None else array('Q')
+        self._hashes = hashes if hashes is not None else array('Q')
+        self._pending = {}
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Map the index at path read-only, or return an empty one if it is
+        missing or was built with a different skills dictionary"""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(HEADER_SIZE)
+                if header[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+                    raise ValueError(f"{path} is not a job index")
+                if header[len(INDEX_MAGIC):len(INDEX_MAGIC) + 32].decode('ascii') != fingerprint:
+                    return cls(fingerprint)
+                count = int.from_bytes(header[len(INDEX_MAGIC) + 32:], 'little')
+                if os.fstat(f.fileno()).st_size < HEADER_SIZE + 16 * count:
+                    raise ValueError(f"Job index {path} is truncated")
+                if not count:
+                    return cls(fingerprint)
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return cls(fingerprint)
+        keys = view[HEADER_SIZE:HEADER_SIZE + 8 * count].cast('Q')
+        hashes = view[HEADER_SIZE + 8 * count:HEADER_SIZE + 16 * count].cast('Q')
+        return cls(fingerprint, keys, hashes)
+
+    def __len__(self):
+        return len(self._keys) + sum(1 for key in self._pending if self._lookup(key) is None)
+
+    def _lookup(self, key):
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._hashes[i]
+        return None
+
+    def get(self, key):
+        """Content hash stored for key, or None for a job not seen before"""
+        if key in self._pending:
+            return self._pending[key]
+        return self._lookup(key)
+
+    def set(self, key, content):
+        self._pending[key] = content
+
+    def save(self, path):
+        """Merge this run's entries into the sorted arrays and write them atomically"""
+        keys = array('Q')
+        hashes = array('Q')
+        pending = sorted(self._pending.items())
+        i = j = 0
+        while i < len(self._keys) or j < len(pending):
+            if j == len(pending) or (i < len(self._keys) and self._keys[i] < pending[j][0]):
+                keys.append(self._keys[i])
+                hashes.append(self._hashes[i])
+                i += 1
+            else:
+                key, content = pending[j]
+                keys.append(key)
+                hashes.append(content)
+                if i < len(self._keys) and self._keys[i] == key:
+                    i += 1  # Replaced by this run's hash
+                j += 1
+        self._keys, self._hashes, self._pending = keys, hashes, {}
+
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(INDEX_MAGIC)
+                f.write(self.fingerprint.encode('ascii'))
+                f.write(len(keys).to_bytes(8, 'little'))
+                f.write(keys.tobytes())
+                f.write(hashes.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+JSON codec for the ETL hot paths
+Uses orjson when it is installed and falls back to the stdlib json module.
+Both backends decode bytes or memoryviews directly and encode records
+straight to compact UTF-8 bytes, so output is the same whichever is used.
+Set ETL_JSON_CODEC=json to force the stdlib backend.
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # Optional speedup
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None and os.environ.get('ETL_JSON_CODEC', 'orjson') == 'orjson' else 'json'
+
+if BACKEND == 'orjson':
+    loads = orjson.loads  # Accepts bytes, memoryview and str; errors subclass ValueError
+
+    def encode_line(record):
+        """One record as a JSON line in bytes"""
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+
+    def encode_lines(records):
+        """Records as JSON lines in a single bytes object"""
+        dumps = orjson.dumps
+        option = orjson.OPT_APPEND_NEWLINE
+        return b''.join([dumps(record, option=option) for record in records])
+else:
+    _decoder = json.JSONDecoder()
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def loads(data):
+        """Parse JSON from bytes, a memoryview or str"""
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+    def encode_line(record):
+        """One record as a JSON line in bytes"""
+        return (_encoder.encode(record) + '\n').encode('utf-8')
+
+    def encode_lines(records):
+        """Records as JSON lines in a single bytes object"""
+        encode = _encoder.encode
+        return ''.join([encode(record) + '\n' for record in records]).encode('utf-8')
+
+def decode_lines(lines):
+    """Parse a batch of JSON lines; returns (records, errors)
+
+    errors holds (1-based line index, message) for lines that are not valid
+    JSON or UTF-8; those lines are skipped.
+    """
+    records = []
+    errors = []
+    append = records.append
+    for index, line in enumerate(lines, 1):
+        try:
+            append(loads(line))
+        except ValueError as e:  # JSONDecodeError or invalid UTF-8
+            errors.append((index, str(e)))
+    return records, errors
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+JSONL input readers
+MappedJSONL splits a raw dump into newline-aligned byte ranges so each ETL
+worker can read its own slice of the file, and yields lines as zero-copy
+memoryviews. open_input() reads .jsonl.gz / .jsonl.zst transparently,
+decompressing on a background thread while the caller parses.
+"""
+import gzip
+import io
+import mmap
+import os
+import queue
+import threading
+
+try:
+    import zstandard
+except ImportError:  # Only needed for .zst input
+    zstandard = None
+
+DEFAULT_RANGE_BYTES = 4 * 1024 * 1024
+DECOMPRESS_BLOCK_BYTES = 1024 * 1024
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+def is_compressed(path):
+    """True for inputs that must be streamed through a decompressor"""
+    return path.endswith(COMPRESSED_SUFFIXES)
+
+def _open_decompressed(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if zstandard is None:
+        raise ImportError("zstandard is required for .zst input (pip install zstandard)")
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+class ThreadedDecompressor(io.RawIOBase):
+    """Raw stream fed by a thread that decompresses ahead into a bounded queue
+
+    zlib and zstd release the GIL, so decompression overlaps with parsing in
+    the consuming thread. At most max_blocks blocks are buffered.
+    """
+
+    def __init__(self, stream, block_size=DECOMPRESS_BLOCK_BYTES, max_blocks=8):
+        self._stream = stream
+        self._block_size = block_size
+        self._queue = queue.Queue(max_blocks)
+        self._stopped = threading.Event()
+        self._block = memoryview(b'')
+        self._eof = False
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        try:
+            while not self._stopped.is_set():
+                block = self._stream.read(self._block_size)
+                self._queue.put(block)
+                if not block:
+                    return
+        except BaseException as e:
+            self._queue.put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._block:
+            if self._eof:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, BaseException):
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._block = memoryview(item)
+        size = min(len(buffer), len(self._block))
+        buffer[:size] = self._block[:size]
+        self._block = self._block[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stopped.set()
+            # Unblock a producer waiting on a full queue
+            while self._thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self._stream.close()
+        super().close()
+
+def open_input(path):
+    """Open a raw JSONL dump for binary line iteration, decompressing if needed"""
+    if not is_compressed(path):
+        return open(path, 'rb')
+    return io.BufferedReader(ThreadedDecompressor(_open_decompressed(path)),
+                             buffer_size=DECOMPRESS_BLOCK_BYTES)
+
+def skip_bytes(f, count):
+    """Advance f by count bytes; seeks plain files, reads through compressed streams"""
+    if f.seekable():
+        f.seek(count, os.SEEK_CUR)
+        return
+    while count > 0:
+        skipped = len(f.read(min(count, DECOMPRESS_BLOCK_BYTES)))
+        if not skipped:
+            raise EOFError("Input ended before the requested offset")
+        count -= skipped
+
+class MappedJSONL:
+    """Read-only memory map over a JSON-lines file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._file = open(path, 'rb')
+        # mmap cannot map an empty file
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def split(self, range_bytes=DEFAULT_RANGE_BYTES, start=0):
+        """Yield (start, end) byte ranges of about range_bytes, each ending after a newline"""
+        while start < self.size:
+            end = self._mm.find(b'\n', min(start + range_bytes, self.size) - 1)
+            end = self.size if end == -1 else end + 1
+            yield start, end
+            start = end
+
+    def lines(self, start, end):
+        """Yield each line in [start, end) as a memoryview without the trailing newline"""
+        if self._mm is None:
+            return
+        view = memoryview(self._mm)
+        pos = start
+        while pos < end:
+            newline = self._mm.find(b'\n', pos, end)
+            line_end = end if newline == -1 else newline
+            yield view[pos:line_end]
+            pos = line_end + 1
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate posting detection
+MinHash signatures over description shingles, grouped with LSH banding so
+each posting is compared only against postings that share a band bucket.
+"""
+import re
+import zlib
+from array import array
+
+NUM_PERM = 64
+BANDS = 8            # 8 bands x 8 rows: ~50% match at Jaccard 0.77, ~99% at 0.9
+SHINGLE_WORDS = 3
+# Bucket candidates are only accepted at this estimated Jaccard similarity
+DEFAULT_THRESHOLD = 0.8
+# Postings the index remembers (~170 MB at the default; see NearDuplicateIndex)
+DEFAULT_WINDOW = 200_000
+BYTES_PER_POSTING = 850   # Measured index memory per remembered posting
+
+_TOKEN = re.compile(rb'\w+')
+_EMPTY = (1 << 64) - 1
+
+def _shingle_hashes(text):
+    """Distinct 64-bit hashes of the lowercased word n-grams of text
+
+    Words are hashed once with CRC-32 and each n-gram is the built-in hash
+    of a tuple of those ints, which (unlike str hashes) is the same in
+    every worker process.
+    """
+    words = list(map(zlib.crc32, _TOKEN.findall(text.lower().encode('utf-8'))))
+    if len(words) < SHINGLE_WORDS:
+        return {hash(tuple(words))} if words else set()
+    return set(map(hash, zip(*(words[i:] for i in range(SHINGLE_WORDS)))))
+
+def minhash_signature(text, num_perm=NUM_PERM):
+    """One-permutation MinHash: each shingle hash is used once, binned by value
+
+    Costs O(shingles) instead of O(shingles x num_perm). Empty bins borrow
+    the next non-empty bin (rotation densification) so signatures stay
+    comparable position by position. Returns None for text without words.
+    """
+    hashes = _shingle_hashes(text)
+    if not hashes:
+        return None
+
+    # Descending order, so the smallest value of each bin is written last
+    minimums = {h % num_perm: h // num_perm for h in sorted(hashes, reverse=True)}
+    signature = [minimums.get(slot, _EMPTY) for slot in range(num_perm)]
+
+    if _EMPTY in signature:
+        # Walk the ring backwards twice so every empty bin sees its next filled bin
+        next_filled = None
+        for i in range(2 * num_perm - 1, -1, -1):
+            slot = i % num_perm
+            if signature[slot] != _EMPTY:
+                next_filled = i
+            elif i < num_perm:
+                signature[slot] = signature[next_filled % num_perm] + (next_filled - i) * _EMPTY
+    return signature
+
+def band_keys(signature, bands=BANDS):
+    """Hash each band of the signature to one int bucket key"""
+    rows = len(signature) // bands
+    return [hash((band,) + tuple(signature[band * rows:(band + 1) * rows])) for band in range(bands)]
+
+def compact_signature(signature):
+    """Low 16 bits of each MinHash value (128 bytes for 64 slots)
+
+    Enough to estimate Jaccard similarity: unequal values collide with
+    probability 1/65536.
+    """
+    return array('H', [value & 0xFFFF for value in signature])
+
+def estimated_jaccard(a, b):
+    """Fraction of MinHash slots two compact signatures agree on"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+class NearDuplicateIndex:
+    """LSH buckets mapping band keys to the first posting of their cluster
+
+    A posting joins the cluster of the first bucket-sharing representative
+    whose signature estimates a Jaccard similarity of at least threshold,
+    so clusters do not chain through postings that merely share a band.
+
+    Memory is bounded to about window postings (roughly 850 bytes each: one
+    entry per band, plus a signature per representative): buckets live in
+    two generations, and once the current one holds window / 2 postings
+    the older is dropped. Near-duplicates are therefore found among about
+    the last window postings (at least window / 2); a representative that
+    keeps gaining duplicates is carried forward into the new generation.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, window=DEFAULT_WINDOW):
+        self.threshold = threshold
+        self.window = window
+        self._buckets = {}
+        self._signatures = {}   # Representative job_id -> compact signature
+        self._old_buckets = {}
+        self._old_signatures = {}
+        self._postings = 0      # Postings added to the current generation
+        self.duplicates = 0
+
+    def _rotate(self):
+        self._old_buckets, self._buckets = self._buckets, {}
+        self._old_signatures, self._signatures = self._signatures, {}
+        self._postings = 0
+
+    def _candidates(self, keys):
+        """Distinct representatives sharing a bucket, in band order"""
+        seen = []
+        for key in keys:
+            representative = self._buckets.get(key)
+            if representative is None:
+                representative = self._old_buckets.get(key)
+            if representative is not None and representative not in seen:
+                seen.append(representative)
+        return seen
+
+    def assign(self, job_id, keys, signature):
+        """Return the job_id this posting duplicates, or None if it starts a cluster
+
+        signature is the posting's compact_signature.
+        """
+        if not keys:
+            return None
+        if self._postings >= self.window // 2:
+            self._rotate()
+
+        representative = None
+        for candidate in self._candidates(keys):
+            stored = self._signatures.get(candidate)
+            if stored is None:
+                stored = self._old_signatures.get(candidate)
+            if stored is not None and estimated_jaccard(signature, stored) >= self.threshold:
+                representative = candidate
+                self._signatures[candidate] = stored  # Keep active clusters alive
+                break
+
+        # Later near-duplicates of this posting join the same cluster
+        cluster = job_id if representative is None else representative
+        if representative is None:
+            self._signatures[job_id] = signature
+        for key in keys:
+            self._buckets.setdefault(key, cluster)
+        self._postings += 1
+
+        if representative is not None:
+            self.duplicates += 1
+        return representative
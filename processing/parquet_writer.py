@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Parquet writer for processed jobs
+Writes the Athena jobs_with_skills layout: <root>/dt=YYYY-MM-DD/part-*.parquet
+with skills as a native ARRAY<STRING> column. <root>/_data_version changes
+whenever the visible data does; lambda/etl_trigger.py rewrites it once new
+part files are registered with Athena, compaction after swapping files.
+"""
+import uuid
+from datetime import date, datetime
+
+from storage import LocalStorage
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Only needed for --format parquet
+    pa = None
+    pq = None
+
+DEFAULT_ROW_GROUP_SIZE = 100_000
+DEFAULT_COMPRESSION = 'snappy'
+DATA_VERSION_KEY = '_data_version'  # Athena skips files starting with '.' or '_'
+
+def part_key(dt):
+    """Unique key for a new part file in the dt partition"""
+    return f"dt={dt}/part-{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.parquet"
+
+def job_schema():
+    """Arrow schema matching the jobs_with_skills table (plus the extra ETL fields)"""
+    return pa.schema([
+        ('id', pa.string()),
+        ('title', pa.string()),
+        ('company', pa.string()),
+        ('description', pa.string()),
+        ('skills', pa.list_(pa.string())),
+        ('skill_count', pa.int32()),
+        ('location', pa.string()),
+        ('country', pa.string()),
+        ('posted_date', pa.string()),
+        ('source', pa.string()),
+        ('processed_at', pa.string()),
+        ('schema_version', pa.string()),
+        ('duplicate_of', pa.string()),
+    ])
+
+def write_data_version(storage):
+    """Replace the data version marker, so query caches keyed on it refresh"""
+    sink = storage.open_writer(DATA_VERSION_KEY, atomic=True)
+    try:
+        sink.write(f"{datetime.now().isoformat()} {uuid.uuid4().hex}\n".encode('ascii'))
+    except BaseException:
+        sink.abort()
+        raise
+    sink.close()
+
+class ParquetJobWriter:
+    """Buffers normalized jobs into row groups of one Parquet file per run
+
+    root is a directory or a storage.LocalStorage / S3Storage. The file only
+    appears under its final name when close() succeeds: locally it is written
+    under a dot-prefixed temporary name (ignored by Athena) and renamed, on S3
+    the multipart upload is completed.
+    """
+
+    def __init__(self, root, dt=None, row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                 compression=DEFAULT_COMPRESSION):
+        if pq is None:
+            raise ImportError("pyarrow is required for Parquet output (pip install pyarrow)")
+
+        self.dt = dt or date.today().isoformat()
+        self.row_group_size = row_group_size
+        self.schema = job_schema()
+        self.rows_written = 0
+
+        storage = LocalStorage(root) if isinstance(root, str) else root
+        key = part_key(self.dt)
+        self.path = storage.url(key)
+        self._sink = storage.open_writer(key, atomic=True)
+
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression=compression)
+        self._columns = {name: [] for name in self.schema.names}
+        self._buffered = 0
+
+    def write(self, jobs):
+        """Add normalized jobs, flushing a row group whenever one fills up"""
+        columns = self._columns
+        for job in jobs:
+            for name in self.schema.names:
+                if name == 'id':
+                    columns['id'].append(job.get('job_id', job.get('id')))
+                else:
+                    columns[name].append(job.get(name))
+            self._buffered += 1
+            if self._buffered >= self.row_group_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        table = pa.Table.from_pydict(self._columns, schema=self.schema)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self.rows_written += self._buffered
+        for values in self._columns.values():
+            values.clear()
+        self._buffered = 0
+
+    def close(self):
+        """Flush the last row group and publish the file into the partition"""
+        self._flush()
+        self._writer.close()
+        self._sink.close()
+
+    def abort(self):
+        """Discard the partial file so Athena never sees it"""
+        self._writer.close()
+        self._sink.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Progress reporting for long ETL runs
+Prints a throttled status line (rows/s, bytes/s, ETA) instead of one line per
+posting, and accumulates per-stage timings for the final JSON report.
+"""
+import json
+import sys
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+class ProgressReporter:
+    """Reports throughput at most once per interval seconds"""
+
+    def __init__(self, total_bytes=None, interval=2.0, stream=None, start_bytes=0):
+        self.total_bytes = total_bytes
+        self.start_bytes = start_bytes  # Already done before this run (resume)
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.rows = 0
+        self.bytes_done = start_bytes
+        self.started = time.monotonic()
+        self._last_report = self.started
+        self._tty = self.stream.isatty()
+
+    def update(self, rows, bytes_done):
+        """Add rows and set the input position; prints when the interval has passed"""
+        self.rows += rows
+        self.bytes_done = bytes_done
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self._print(now)
+
+    def _print(self, now, end=None):
+        elapsed = max(now - self.started, 1e-9)
+        line = (f"   ⏳ {self.rows:,} rows | {self.rows / elapsed:,.0f} rows/s | "
+                f"{(self.bytes_done - self.start_bytes) / elapsed / 1e6:,.1f} MB/s")
+        if self.total_bytes:
+            fraction = min(self.bytes_done / self.total_bytes, 1.0)
+            line += f" | {fraction * 100:5.1f}%"
+            done_here = self.bytes_done - self.start_bytes
+            if done_here > 0 and fraction < 1:
+                eta = elapsed * (self.total_bytes - self.bytes_done) / done_here
+                line += f" | ETA {timedelta(seconds=int(eta))}"
+        if end is None:
+            end = '\r' if self._tty else '\n'
+        self.stream.write(line + end)
+        self.stream.flush()
+
+    def finish(self):
+        """Print the final status line and return the elapsed seconds"""
+        now = time.monotonic()
+        self._print(now, end='\n')
+        return now - self.started
+
+class StageTimer:
+    """Accumulates seconds per named stage across records, chunks and workers"""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+
+    def add(self, stage, seconds):
+        self.seconds[stage] += seconds
+
+    def merge(self, seconds):
+        for stage, value in seconds.items():
+            self.seconds[stage] += value
+
+    def report(self, elapsed, **extra):
+        """JSON breakdown; stage totals are summed over workers, so they can exceed elapsed"""
+        return json.dumps({
+            'elapsed_seconds': round(elapsed, 3),
+            'stage_seconds': {stage: round(value, 3) for stage, value in self.seconds.items()},
+            **extra
+        })
@@ -0,0 +1,693 @@
+#!/usr/bin/env python3
+"""
+Compiled skill matcher shared by the ETL pipeline and the skill extractor.
+Finds every canonical skill of the skills dictionary in a single scan of the
+lowercased text. Small dictionaries compile to one trie-shaped regex; large
+taxonomies (hundreds of thousands of aliases) use a token scan with hash
+lookups, whose build time grows linearly and whose cost per character does
+not depend on the dictionary size. Both give the same results as matching
+every alias with \\b...\\b. Built matchers are cached on disk, keyed by the
+dictionary's content hash, so short-lived workers skip the build. An
+optional fuzzy mode also catches misspelled aliases through a precomputed
+deletion index (FuzzyIndex).
+
+Ambiguous aliases ("go", "rest", "excel") are written in the dictionary as
+{"alias": ..., "require": [...], "reject": [...], "window": N} instead of a
+plain string. They are matched like any other alias, and only when one is
+found does a ContextRule look at the words around it to keep or drop it.
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from itertools import accumulate
+
+# Bump when the pickled layout of SkillMatcher changes
+CACHE_VERSION = 5
+# Per user: unpickling runs code, so the cache must not be writable by others
+DEFAULT_CACHE_DIR = os.environ.get(
+    'SKILL_MATCHER_CACHE_DIR',
+    os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'skill-matcher')
+)
+# Above this many aliases the trie regex takes too long to compile and the
+# token scan is faster anyway (see benchmark_skill_matcher.py)
+TRIE_MAX_ALIASES = 2000
+# Fuzzy mode: single-word aliases of at least FUZZY_MIN_LENGTH characters
+# also match words one edit away, and from FUZZY_MIN_LENGTH_2 on two edits
+# away. Shorter aliases are too close to ordinary words ("scala", "spring").
+FUZZY_MIN_LENGTH = 7
+FUZZY_MIN_LENGTH_2 = 10
+# Words on each side of an ambiguous alias that a ContextRule looks at
+DEFAULT_CONTEXT_WINDOW = 8
+
+_WORD_CHAR = re.compile(r'\w')
+_WORDS = re.compile(r'\w+')
+# Splits text into runs of word characters (even positions) and of
+# non-word characters (odd positions); \b sits exactly between runs
+_RUNS = re.compile(r'(\W+)')
+
+
+def _is_boundary(left, right):
+    """True when a regex \\b sits between the two characters"""
+    return bool(_WORD_CHAR.match(left)) != bool(_WORD_CHAR.match(right))
+
+
+def _trie_pattern(node):
+    """Turn an alias trie into a regex that prefers the longest alias"""
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char != '']
+    if '' in node:
+        # Ending here is tried last so longer aliases win at the same position
+        branches.append(r'\b')
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+def _deletes(word, distance):
+    """word plus every string obtained by deleting up to distance characters,
+    keeping the first and the last one"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(1, len(w) - 1)}
+        variants |= frontier
+    return variants
+
+
+def _edit_distance(a, b, limit):
+    """Optimal string alignment distance (edits plus adjacent transpositions),
+    or limit + 1 as soon as it is known to exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = None
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, row = previous, row, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            row[j] = min(previous[j] + 1, row[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], before[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+    return min(row[-1], limit + 1)
+
+
+class FuzzyIndex:
+    """Typo-tolerant lookup of single-word aliases (SymSpell-style)
+
+    Every alias is stored under each string its deletion neighbourhood
+    contains, so a word within the alias's edit distance shares at least one
+    key with it: candidates come from hashing the word's own deletions instead
+    of comparing it with every alias, and are then checked with a real edit
+    distance. Misspellings rarely touch the first or last letter, while other
+    words close to an alias mostly differ there ("collaborative" and
+    "collaboration", "dealership" and "leadership"), so only words with the
+    alias's first and last letter match, and deletions keep both. Words
+    repeat heavily across postings, so results are memoized per word and
+    most lookups cost one dict access.
+    """
+
+    def __init__(self, alias_ids, memo_size=200_000):
+        self._ids = {}
+        self._deletes = {}
+        # (first letter, last letter, length) of every word that may be in reach
+        self._shapes = set()
+        for alias_lower, ids in alias_ids.items():
+            if len(alias_lower) < FUZZY_MIN_LENGTH or not _WORDS.fullmatch(alias_lower):
+                continue
+            self._ids[alias_lower] = ids if ids.__class__ is tuple else (ids,)
+            distance = self._distance(alias_lower)
+            for length in range(len(alias_lower) - distance, len(alias_lower) + distance + 1):
+                self._shapes.add((alias_lower[0], alias_lower[-1], length))
+            for variant in _deletes(alias_lower, distance):
+                entry = self._deletes.get(variant)
+                if entry is None:
+                    self._deletes[variant] = alias_lower
+                elif entry.__class__ is tuple:
+                    self._deletes[variant] = entry + (alias_lower,)
+                else:
+                    self._deletes[variant] = (entry, alias_lower)
+        # Only words in this length range can be within reach of an alias
+        longest = max(map(len, self._ids), default=FUZZY_MIN_LENGTH)
+        self._words = re.compile(r'\b\w{%d,%d}\b' % (FUZZY_MIN_LENGTH - 1, longest + 2))
+        self.memo_size = memo_size
+        self._memo = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_memo'] = {}
+        return state
+
+    @staticmethod
+    def _distance(alias_lower):
+        """Edits allowed for an alias"""
+        return 2 if len(alias_lower) >= FUZZY_MIN_LENGTH_2 else 1
+
+    def lookup(self, word):
+        """(distance, alias ids) of the closest aliases to word, or None"""
+        result = self._memo.get(word, False)
+        if result is not False:
+            return result
+        if (word[0], word[-1], len(word)) not in self._shapes:
+            return None
+
+        # A word two edits from an alias is at least FUZZY_MIN_LENGTH_2 - 2 long
+        distance = 2 if len(word) >= FUZZY_MIN_LENGTH_2 - 2 else 1
+        candidates = set()
+        for variant in _deletes(word, distance):
+            entry = self._deletes.get(variant)
+            if entry is None:
+                continue
+            if entry.__class__ is tuple:
+                candidates.update(entry)
+            else:
+                candidates.add(entry)
+
+        result = None
+        for alias_lower in candidates:
+            limit = self._distance(alias_lower)
+            if result is not None:
+                limit = min(limit, result[0])
+            found = _edit_distance(word, alias_lower, limit)
+            if found > limit or found == 0:
+                continue
+            if result is None or found < result[0]:
+                result = (found, self._ids[alias_lower])
+            else:
+                result = (found, result[1] + self._ids[alias_lower])
+
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[word] = result
+        return result
+
+    def find(self, lowered, exact):
+        """{alias id: distance} for the words of lowered that are not in exact"""
+        found = {}
+        memo = self._memo
+        for word in set(self._words.findall(lowered)):
+            if word in exact:
+                continue
+            result = memo.get(word, False)
+            if result is False:
+                result = self.lookup(word)
+            if result is not None:
+                distance, ids = result
+                for alias_id in ids:
+                    if found.get(alias_id, distance) >= distance:
+                        found[alias_id] = distance
+        return found
+
+    def find_spans(self, lowered, exact):
+        """Yield (start, end, alias ids, distance) for each word of lowered that
+        is not in exact but close to an alias"""
+        memo = self._memo
+        for m in self._words.finditer(lowered):
+            word = m.group()
+            if word in exact:
+                continue
+            result = memo.get(word, False)
+            if result is False:
+                result = self.lookup(word)
+            if result is not None:
+                yield m.start(), m.end(), result[1], result[0]
+
+
+def _terms_pattern(terms):
+    """Regex matching any of terms as whole words, recording where each ends"""
+    if not terms:
+        return None
+    alternatives = '|'.join(re.escape(term.lower()) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(r'(?=(?<!\w)(' + alternatives + r')(?!\w))')
+
+
+class ContextRule:
+    """Keeps a hit of an ambiguous alias only in the right context
+
+    An occurrence is rejected when one of the reject phrases ("rest assured",
+    "go above") covers it. Otherwise it is accepted when there are no require
+    terms, or when one of them appears within window words on either side
+    ("rest" next to "api"). The alias counts as found if any occurrence in
+    the text is accepted.
+    """
+
+    def __init__(self, alias_lower, require=(), reject=(), window=DEFAULT_CONTEXT_WINDOW):
+        self.window = window
+        self._length = len(alias_lower)
+        self._occurrences = re.compile(r'(?=\b' + re.escape(alias_lower) + r'\b)')
+        self._require = _terms_pattern(require)
+        self._reject = _terms_pattern(reject)
+        self._reject_reach = max(map(len, reject), default=0)
+
+    def _rejected(self, lowered, start, end):
+        if self._reject is None:
+            return False
+        reach = self._reject_reach
+        for m in self._reject.finditer(lowered, max(0, start - reach), end + reach):
+            if m.start() < end and m.end(1) > start:
+                return True
+        return False
+
+    def _window(self, lowered, start, end):
+        """(lo, hi) bounds of the window words before and after lowered[start:end]"""
+        reach = 40 * self.window
+        lo = max(0, start - reach)
+        starts = [m.start() for m in _WORDS.finditer(lowered, lo, start)]
+        if len(starts) >= self.window:
+            lo = starts[-self.window]
+        ends = [m.end() for m in _WORDS.finditer(lowered, end, end + reach)]
+        hi = ends[self.window - 1] if len(ends) >= self.window else min(len(lowered), end + reach)
+        return lo, hi
+
+    def accepts_at(self, lowered, start, end):
+        """True if the occurrence at lowered[start:end] passes the rule"""
+        if self._rejected(lowered, start, end):
+            return False
+        if self._require is None:
+            return True
+        lo, hi = self._window(lowered, start, end)
+        return self._require.search(lowered, lo, hi) is not None
+
+    def accepts(self, lowered):
+        """True if some occurrence of the alias in lowered passes the rule"""
+        for m in self._occurrences.finditer(lowered):
+            if self.accepts_at(lowered, m.start(), m.start() + self._length):
+                return True
+        return False
+
+
+class SkillMatcher:
+    """Finds canonical skills from a {skill: [aliases]} dictionary in one pass
+
+    Aliases are strings, or for ambiguous aliases dicts with a ContextRule's
+    arguments ({"alias": "go", "require": [...], "reject": [...]}).
+
+    With fuzzy=True it also builds a FuzzyIndex, and words that are not an
+    alias themselves match aliases within a small edit distance. Ambiguous
+    aliases are left out of it.
+    """
+
+    def __init__(self, skills_dict, fuzzy=False):
+        self.skills = list(skills_dict)
+
+        # Aliases are numbered in dictionary order, so the lowest alias id
+        # found for a skill is its first alias in dictionary order
+        self._alias_text = []
+        self._alias_skill = array('I')
+        for skill_idx, aliases in enumerate(skills_dict.values()):
+            self._alias_text.extend(aliases)
+            self._alias_skill.extend([skill_idx] * len(aliases))
+
+        # Alias id -> ContextRule of the ambiguous aliases
+        self._rules = {}
+        for alias_id in [i for i, alias in enumerate(self._alias_text) if alias.__class__ is dict]:
+            entry = self._alias_text[alias_id]
+            alias = self._alias_text[alias_id] = entry['alias']
+            self._rules[alias_id] = ContextRule(
+                alias.lower(), entry.get('require', ()), entry.get('reject', ()),
+                entry.get('window', DEFAULT_CONTEXT_WINDOW)
+            )
+        self._ambiguous = frozenset(self._rules)
+
+        # Lowercased alias text -> alias id, or a tuple of ids when shared
+        lowered = [alias.lower() for alias in self._alias_text]
+        self._alias_length = array('I', map(len, lowered))
+        alias_ids = dict(zip(lowered, range(len(lowered))))  # Last id wins on repeats
+        if len(alias_ids) < len(lowered):
+            shared = {}
+            for alias_id in [i for i, alias_lower in enumerate(lowered) if alias_ids[alias_lower] != i]:
+                shared.setdefault(lowered[alias_id], []).append(alias_id)
+            for alias_lower, ids in shared.items():
+                alias_ids[alias_lower] = tuple(ids) + (alias_ids[alias_lower],)
+        alias_ids.pop('', None)
+
+        self._pattern = None
+        if len(alias_ids) <= TRIE_MAX_ALIASES:
+            self._build_trie(alias_ids)
+        else:
+            self._build_token_index(alias_ids)
+        self._fuzzy = None
+        if fuzzy:
+            ambiguous = {self._alias_text[alias_id].lower() for alias_id in self._rules}
+            self._fuzzy = FuzzyIndex({alias_lower: ids for alias_lower, ids in alias_ids.items()
+                                      if alias_lower not in ambiguous})
+
+    @property
+    def alias_text(self):
+        """Every alias by alias id, in dictionary order"""
+        return self._alias_text
+
+    @property
+    def aliases(self):
+        """Aliases per skill, in dictionary order"""
+        grouped = [[] for _ in self.skills]
+        for alias, skill_idx in zip(self._alias_text, self._alias_skill):
+            grouped[skill_idx].append(alias)
+        return grouped
+
+    def _build_trie(self, alias_ids):
+        # The regex reports the longest alias at each position, so every hit
+        # also carries the shorter aliases that are word-bounded prefixes of it
+        # ("node" inside "node.js", "rest" inside "rest api").
+        self._hits = {}
+        for alias_lower, ids in alias_ids.items():
+            hits = [ids] if ids.__class__ is int else list(ids)
+            for end in range(1, len(alias_lower)):
+                prefix = alias_lower[:end]
+                if prefix in alias_ids and _is_boundary(alias_lower[end - 1], alias_lower[end]):
+                    prefix_ids = alias_ids[prefix]
+                    hits.extend([prefix_ids] if prefix_ids.__class__ is int else prefix_ids)
+            self._hits[alias_lower] = tuple(hits)
+
+        trie = {}
+        for alias_lower in alias_ids:
+            node = trie
+            for char in alias_lower:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        # Zero-width lookahead so finditer tries every start position and
+        # overlapping aliases ("js" in "node.js") are still found.
+        if trie:
+            self._pattern = re.compile(r'(?=\b(' + _trie_pattern(trie) + r'))')
+
+    def _build_token_index(self, alias_ids):
+        # An alias matches exactly when it equals a sequence of whole runs of
+        # the text, so the text is scanned run by run. A run starts a candidate
+        # when it is an alias or a prefix, and a candidate is extended while
+        # the joined runs are still a proper prefix of some alias. Prefixes are
+        # kept only where they end in a word run (plus the leading non-word
+        # run of aliases that start with one); the scan does not prune after a
+        # non-word run, which at most costs one extra step.
+        self._hits = alias_ids
+        prefixes = self._prefixes = set()
+        for alias_lower in [alias for alias in alias_ids if not alias.isalnum()]:
+            words = alias_lower.split(' ')
+            if all(words) and ''.join(words).isalnum():  # Words and single spaces
+                prefix = words[0]
+                prefixes.add(prefix)
+                for word in words[1:-1]:
+                    prefix += ' ' + word
+                    prefixes.add(prefix)
+                continue
+            runs = _RUNS.split(alias_lower)
+            prefix = runs[0]
+            prefixes.add(prefix or runs[1])
+            for i in range(1, len(runs) - 2, 2):
+                prefix += runs[i] + runs[i + 1]
+                prefixes.add(prefix)
+
+    @property
+    def fuzzy(self):
+        return self._fuzzy is not None
+
+    @staticmethod
+    def _trusted(st):
+        """Owned by us and not writable by anyone else (always true without uids)"""
+        if not hasattr(os, 'getuid'):
+            return True
+        return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+    @classmethod
+    def load(cls, dict_path, cache_dir=DEFAULT_CACHE_DIR, fuzzy=False):
+        """Load a matcher for dict_path, reusing the compiled cache when present
+
+        A cached pickle is only loaded when both it and cache_dir belong to
+        the current user and are not group or world writable; otherwise the
+        matcher is rebuilt (and not cached).
+        """
+        with open(dict_path, 'rb') as f:
+            raw = f.read()
+
+        if cache_dir is None:
+            return cls(json.loads(raw), fuzzy)
+
+        digest = hashlib.sha256(raw).hexdigest()[:32]
+        mode = f"-fuzzy{FUZZY_MIN_LENGTH}.{FUZZY_MIN_LENGTH_2}" if fuzzy else ''
+        cache_path = os.path.join(cache_dir, f"skill-matcher-v{CACHE_VERSION}-{digest}{mode}.pkl")
+
+        try:
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            trusted_dir = cls._trusted(os.stat(cache_dir))
+        except OSError:
+            trusted_dir = False
+        if trusted_dir:
+            try:
+                with open(cache_path, 'rb') as f:
+                    if cls._trusted(os.fstat(f.fileno())):
+                        matcher = pickle.load(f)
+                        if isinstance(matcher, cls):
+                            return matcher
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+                pass  # Missing or stale cache, rebuild below
+
+        matcher = cls(json.loads(raw), fuzzy)
+        if not trusted_dir:
+            return matcher
+        try:
+            # Write then rename so concurrent workers never read a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(matcher, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # Read-only filesystem: still usable, just not cached
+        return matcher
+
+    def _scan_tokens(self, lowered):
+        """Yield (alias ids, first run, last run) for every word-bounded alias in lowered
+
+        Alias ids are an int or a tuple; runs index _RUNS.split(lowered).
+        """
+        runs = _RUNS.split(lowered)
+        # A leading or trailing non-word run has no \b at the edge of the text
+        no_start = 1 if not runs[0] else -1
+        no_end = -1
+        if not runs[-1]:
+            runs.pop()
+            no_end = len(runs) - 1
+        last = len(runs) - 1
+        hits = self._hits
+        prefixes = self._prefixes
+        for start in [i for i, run in enumerate(runs) if run in hits or run in prefixes]:
+            if start == no_start:
+                continue
+            text = runs[start]
+            end = start
+            while True:
+                ids = hits.get(text)
+                if ids is not None and end != no_end:
+                    yield ids, start, end
+                if end == last or (not end & 1 and text not in prefixes):
+                    break
+                end += 1
+                text += runs[end]
+
+    def match(self, text):
+        """Return [(canonical_skill, matched_alias)] in dictionary order"""
+        return [(skill, alias) for skill, alias, _ in self.match_with_distance(text)]
+
+    def match_with_distance(self, text):
+        """Return [(canonical_skill, matched_alias, edit_distance)] in dictionary order
+
+        The distance is 0 for exact matches; only fuzzy matchers report more.
+        A skill found exactly is never reported as a fuzzy match.
+        """
+        if not text or not self._hits:
+            return []
+
+        lowered = text.lower()
+        found = set()
+        if self._pattern is not None:
+            for m in self._pattern.finditer(lowered):
+                found.update(self._hits[m.group(1)])
+        else:
+            for ids, _, _ in self._scan_tokens(lowered):
+                if ids.__class__ is int:
+                    found.add(ids)
+                else:
+                    found.update(ids)
+
+        # Second stage, only for ambiguous aliases that were found
+        if self._ambiguous and not found.isdisjoint(self._ambiguous):
+            for alias_id in found & self._ambiguous:
+                if not self._rules[alias_id].accepts(lowered):
+                    found.discard(alias_id)
+
+        distances = self._fuzzy.find(lowered, self._hits) if self._fuzzy is not None else None
+        if distances:
+            alias_skill = self._alias_skill
+            for alias_id in found:
+                distances[alias_id] = 0
+            ranked = sorted(distances, key=lambda i: (alias_skill[i], distances[i], i))
+        else:
+            ranked = sorted(found)
+
+        matches = []
+        last_skill = -1
+        for alias_id in ranked:
+            skill_idx = self._alias_skill[alias_id]
+            if skill_idx != last_skill:
+                matches.append((self.skills[skill_idx], self._alias_text[alias_id],
+                                distances[alias_id] if distances else 0))
+                last_skill = skill_idx
+        return matches
+
+    def extract(self, text):
+        """Return the canonical skills found in text"""
+        return [skill for skill, _, _ in self.match_with_distance(text)]
+
+    def match_spans(self, text):
+        """Return [(start, end, alias_id, edit_distance)] for every alias occurrence
+
+        Unlike match(), every occurrence of every alias is reported, sorted
+        by position, so text[start:end] is the matched text. Ambiguous
+        aliases are checked occurrence by occurrence, and fuzzy occurrences
+        of skills that are also found exactly are left out.
+        """
+        if not text or not self._hits:
+            return []
+
+        lowered = text.lower()
+        spans = []
+        if self._pattern is not None:
+            alias_length = self._alias_length
+            for m in self._pattern.finditer(lowered):
+                start = m.start()
+                for alias_id in self._hits[m.group(1)]:
+                    spans.append((start, start + alias_length[alias_id], alias_id, 0))
+        else:
+            runs = _RUNS.split(lowered)
+            offsets = [0, *accumulate(map(len, runs))]
+            for ids, first, last in self._scan_tokens(lowered):
+                start, end = offsets[first], offsets[last + 1]
+                if ids.__class__ is int:
+                    spans.append((start, end, ids, 0))
+                else:
+                    spans.extend([(start, end, alias_id, 0) for alias_id in ids])
+
+        if self._ambiguous:
+            rules = self._rules
+            spans = [span for span in spans
+                     if span[2] not in rules or rules[span[2]].accepts_at(lowered, span[0], span[1])]
+
+        if self._fuzzy is not None:
+            exact_skills = {self._alias_skill[span[2]] for span in spans}
+            for start, end, ids, distance in self._fuzzy.find_spans(lowered, self._hits):
+                spans.extend([(start, end, alias_id, distance) for alias_id in ids
+                              if self._alias_skill[alias_id] not in exact_skills])
+
+        spans.sort()
+        if len(lowered) != len(text):
+            # Lowercasing changed the length ("İ"); map offsets back onto text
+            position = [i for i, char in enumerate(text) for _ in char.lower()] + [len(text)]
+            spans = [(position[start], position[end], alias_id, distance)
+                     for start, end, alias_id, distance in spans]
+        return spans
+
+    def match_batch(self, texts):
+        """Match a batch of texts into flat BatchMatches columns"""
+        batch = BatchMatches()
+        alias_skill = self._alias_skill
+        for job, text in enumerate(texts):
+            spans = self.match_spans(text)
+            batch.counts.append(len(spans))
+            if not spans:
+                continue
+            starts, ends, alias_ids, distances = zip(*spans)
+            batch.job.extend([job] * len(spans))
+            batch.skill.extend([alias_skill[alias_id] for alias_id in alias_ids])
+            batch.alias.extend(alias_ids)
+            batch.start.extend(starts)
+            batch.end.extend(ends)
+            batch.distance.extend(distances)
+        return batch
+
+
+@dataclass
+class BatchMatches:
+    """Every alias occurrence in a batch of texts, as flat arrays
+
+    Row i says that texts[job[i]][start[i]:end[i]] matched alias alias[i]
+    (an index into SkillMatcher.alias_text) of skill skill[i] (an index into
+    SkillMatcher.skills), with edit distance distance[i] (0 unless fuzzy).
+    Rows are grouped by text in batch order and sorted by start, and
+    counts[j] is the number of rows of text j.
+    """
+    job: array = field(default_factory=lambda: array('I'))
+    skill: array = field(default_factory=lambda: array('I'))
+    alias: array = field(default_factory=lambda: array('I'))
+    start: array = field(default_factory=lambda: array('I'))
+    end: array = field(default_factory=lambda: array('I'))
+    distance: array = field(default_factory=lambda: array('B'))
+    counts: array = field(default_factory=lambda: array('I'))
+
+    def __len__(self):
+        return len(self.job)
+
+    def rows(self, job):
+        """Row range of one text"""
+        first = sum(self.counts[:job])
+        return range(first, first + self.counts[job])
+
+
+class ExtractionCache:
+    """Bounded LRU of extract() results keyed by a hash of the text
+
+    Reposted jobs repeat the same title and description byte for byte, so
+    their skills are looked up instead of rescanned. Each process keeps its
+    own cache; hits and misses are counted for reporting.
+    """
+
+    def __init__(self, matcher, max_entries=100_000):
+        self.matcher = matcher
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def extract(self, text):
+        """Return the canonical skills found in text, from the cache when possible"""
+        key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        skills = self._entries.get(key)
+        if skills is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(skills)
+
+        self.misses += 1
+        skills = self.matcher.extract(text)
+        self._entries[key] = tuple(skills)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return skills
+
+    def match_batch(self, texts):
+        """Batches are matched in full, without the cache"""
+        return self.matcher.match_batch(texts)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def as_matcher(skills):
+    """Accept a raw skills dictionary, a SkillMatcher or an ExtractionCache
+
+    A raw dictionary is compiled on every call, so repeated callers with
+    large taxonomies should pass SkillMatcher.load(path) instead.
+    """
+    if isinstance(skills, (SkillMatcher, ExtractionCache)):
+        return skills
+    return SkillMatcher(skills)
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Output storage for the ETL
+LocalStorage writes under a directory; S3Storage streams to an S3-compatible
+bucket with concurrent multipart uploads while the ETL keeps producing data.
+LocalS3Client is a filesystem-backed stand-in for the S3 client so the
+multipart path can be exercised offline.
+"""
+import hashlib
+import io
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PART_SIZE = 16 * 1024 * 1024   # S3 needs >= 5 MiB for every part but the last
+DEFAULT_MAX_CONCURRENCY = 4
+
+class LocalFileWriter(io.RawIOBase):
+    """Binary writer for a local file; atomic writers go through a dot-prefixed temp file"""
+
+    def __init__(self, path, atomic=False, append_at=None):
+        self.path = path
+        directory, name = os.path.split(path)
+        self._write_path = os.path.join(directory, f".{name}.tmp") if atomic else path
+        if append_at is None:
+            self._file = open(self._write_path, 'wb')
+        else:
+            # Reopen an existing output, dropping anything after append_at
+            self._file = open(self._write_path, 'r+b')
+            self._file.truncate(append_at)
+            self._file.seek(append_at)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self._file.write(data)
+
+    def tell(self):
+        return self._file.tell()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def flush(self):
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+            if self._write_path != self.path:
+                os.replace(self._write_path, self.path)
+        super().close()
+
+    def abort(self):
+        """Close without publishing an atomic write"""
+        if not self.closed:
+            self._file.close()
+            if self._write_path != self.path:
+                os.remove(self._write_path)
+        super().close()
+
+    def __del__(self):
+        # IOBase.__del__ would close() and publish a half-written atomic file
+        if self._write_path != self.path:
+            self.abort()
+        else:
+            self.close()
+
+class LocalStorage:
+    """Keys are paths relative to a local root directory"""
+
+    supports_resume = True
+
+    def __init__(self, root):
+        self.root = root
+
+    def url(self, key):
+        return os.path.join(self.root, key)
+
+    def open_writer(self, key, atomic=False, append_at=None):
+        path = self.url(key)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        return LocalFileWriter(path, atomic=atomic, append_at=append_at)
+
+    def list(self, prefix=''):
+        """[(key, size)] of the files under the prefix directory, sorted by key"""
+        found = []
+        for dirpath, _, filenames in os.walk(self.url(prefix)):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    size = os.path.getsize(path)
+                except FileNotFoundError:  # Renamed or removed while listing
+                    continue
+                found.append((os.path.relpath(path, self.root).replace(os.sep, '/'), size))
+        return sorted(found)
+
+    def open_reader(self, key):
+        return open(self.url(key), 'rb')
+
+    def rename(self, key, new_key):
+        os.replace(self.url(key), self.url(new_key))
+
+    def delete(self, keys):
+        for key in keys:
+            os.remove(self.url(key))
+
+class MultipartUploadWriter(io.RawIOBase):
+    """Buffers writes into parts and uploads them on a thread pool
+
+    At most max_concurrency parts upload at once, plus one waiting part, so
+    memory stays near (max_concurrency + 2) * part_size. Objects smaller
+    than one part are sent with a single put_object. Nothing is visible in
+    the bucket until close() completes the upload.
+    """
+
+    def __init__(self, client, bucket, key, part_size=DEFAULT_PART_SIZE,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._written = 0
+        self._upload_id = None
+        self._parts = []
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._slots = threading.Semaphore(max_concurrency + 1)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        self._written += len(data)
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._submit(part)
+        return len(data)
+
+    def tell(self):
+        return self._written
+
+    def _submit(self, body):
+        if self._upload_id is None:
+            response = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key)
+            self._upload_id = response['UploadId']
+        part_number = len(self._parts) + 1
+        self._slots.acquire()  # Backpressure: wait for an upload slot
+        future = self._executor.submit(self._upload_part, part_number, body)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._parts.append(future)
+
+    def _upload_part(self, part_number, body):
+        response = self.client.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                                           PartNumber=part_number, Body=body)
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer))
+            else:
+                if self._buffer:
+                    self._submit(bytes(self._buffer))
+                parts = [future.result() for future in self._parts]
+                self.client.complete_multipart_upload(Bucket=self.bucket, Key=self.key,
+                                                      UploadId=self._upload_id,
+                                                      MultipartUpload={'Parts': parts})
+        except BaseException:
+            self.abort()
+            raise
+        self._executor.shutdown()
+        super().close()
+
+    def abort(self):
+        """Cancel the upload and discard uploaded parts"""
+        if self.closed:
+            return
+        self._executor.shutdown(cancel_futures=True)
+        if self._upload_id is not None:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+        super().close()
+
+    def __del__(self):
+        # Never complete an upload that was not closed explicitly
+        self.abort()
+
+class S3Storage:
+    """Keys are object keys under s3://bucket/prefix"""
+
+    supports_resume = False
+
+    def __init__(self, bucket, prefix='', client=None, endpoint_url=None,
+                 part_size=DEFAULT_PART_SIZE, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        if client is None:
+            import boto3  # Only needed when writing to a real S3 endpoint
+            client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+
+    def _key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def url(self, key):
+        return f"s3://{self.bucket}/{self._key(key)}"
+
+    def open_writer(self, key, atomic=False, append_at=None):
+        # Multipart uploads are atomic already; appending is not possible
+        if append_at is not None:
+            raise ValueError("S3 outputs cannot be appended to")
+        return MultipartUploadWriter(self.client, self.bucket, self._key(key),
+                                     self.part_size, self.max_concurrency)
+
+    def list(self, prefix=''):
+        """[(key, size)] of the objects under prefix, sorted by key"""
+        found = []
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        request = {'Bucket': self.bucket, 'Prefix': self._key(prefix)}
+        while True:
+            response = self.client.list_objects_v2(**request)
+            found.extend((obj['Key'][strip:], obj['Size']) for obj in response.get('Contents', []))
+            if not response.get('IsTruncated'):
+                return found
+            request['ContinuationToken'] = response['NextContinuationToken']
+
+    def open_reader(self, key):
+        # Parquet readers need to seek, so the object is read into memory
+        body = self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+        return io.BytesIO(body.read())
+
+    def rename(self, key, new_key):
+        """Server-side copy then delete; the new key appears atomically"""
+        self.client.copy_object(Bucket=self.bucket, Key=self._key(new_key),
+                                CopySource={'Bucket': self.bucket, 'Key': self._key(key)})
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def delete(self, keys):
+        keys = [self._key(key) for key in keys]
+        for i in range(0, len(keys), 1000):  # delete_objects takes at most 1000 keys
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[i:i + 1000]], 'Quiet': True}
+            )
+            if response.get('Errors'):
+                error = response['Errors'][0]
+                raise OSError(f"Could not delete s3://{self.bucket}/{error['Key']}: {error['Message']}")
+
+class LocalS3Client:
+    """Subset of the boto3 S3 client that stores objects under root/<bucket>/<key>"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _object_path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def _upload_dir(self, upload_id):
+        return os.path.join(self.root, '.uploads', upload_id)
+
+    def _publish(self, bucket, key, chunks):
+        path = self._object_path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Staged outside the bucket so listings never see partial objects
+        os.makedirs(os.path.join(self.root, '.uploads'), exist_ok=True)
+        tmp_path = os.path.join(self.root, '.uploads', f"{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+
+    def put_object(self, Bucket, Key, Body):
+        self._publish(Bucket, Key, [Body])
+        return {'ETag': hashlib.md5(Body).hexdigest()}
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._upload_dir(upload_id))
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        with open(os.path.join(self._upload_dir(UploadId), f"{PartNumber:05d}"), 'wb') as f:
+            f.write(Body)
+        return {'ETag': hashlib.md5(Body).hexdigest()}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        upload_dir = self._upload_dir(UploadId)
+
+        def chunks():
+            for part in sorted(MultipartUpload['Parts'], key=lambda p: p['PartNumber']):
+                with open(os.path.join(upload_dir, f"{part['PartNumber']:05d}"), 'rb') as f:
+                    yield f.read()
+
+        self._publish(Bucket, Key, chunks())
+        shutil.rmtree(upload_dir)
+        return {'Bucket': Bucket, 'Key': Key}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        shutil.rmtree(self._upload_dir(UploadId), ignore_errors=True)
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix='', ContinuationToken=None, MaxKeys=1000):
+        bucket_dir = os.path.join(self.root, Bucket)
+        keys = []
+        for dirpath, _, filenames in os.walk(bucket_dir):
+            for name in filenames:
+                key = os.path.relpath(os.path.join(dirpath, name), bucket_dir).replace(os.sep, '/')
+                if key.startswith(Prefix) and (ContinuationToken is None or key > ContinuationToken):
+                    keys.append(key)
+        keys.sort()
+        page = keys[:MaxKeys]
+        response = {
+            'Contents': [{'Key': key, 'Size': os.path.getsize(self._object_path(Bucket, key))} for key in page],
+            'KeyCount': len(page),
+            'IsTruncated': len(keys) > MaxKeys,
+        }
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = page[-1]
+        return response
+
+    def get_object(self, Bucket, Key):
+        path = self._object_path(Bucket, Key)
+        return {'Body': open(path, 'rb'), 'ContentLength': os.path.getsize(path)}
+
+    def copy_object(self, Bucket, Key, CopySource):
+        with open(self._object_path(CopySource['Bucket'], CopySource['Key']), 'rb') as f:
+            self._publish(Bucket, Key, iter(lambda: f.read(DEFAULT_PART_SIZE), b''))
+        return {}
+
+    def delete_object(self, Bucket, Key):
+        try:
+            os.remove(self._object_path(Bucket, Key))
+        except FileNotFoundError:  # S3 deletes are idempotent
+            pass
+        return {}
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete['Objects']:
+            self.delete_object(Bucket, obj['Key'])
+        return {'Deleted': [] if Delete.get('Quiet') else [{'Key': obj['Key']} for obj in Delete['Objects']]}
+
+def open_storage(location, s3_endpoint_url=None, s3_local_root=None):
+    """Storage rooted at a local directory or an s3://bucket/prefix URL
+
+    s3_local_root swaps the S3 client for LocalS3Client for offline runs.
+    """
+    if not location.startswith('s3://'):
+        return LocalStorage(location)
+    bucket, _, prefix = location[len('s3://'):].partition('/')
+    client = LocalS3Client(s3_local_root) if s3_local_root else None
+    return S3Storage(bucket, prefix, client=client, endpoint_url=s3_endpoint_url)
+
+def split_location(location):
+    """Split a file location into (parent location, name) for open_storage"""
+    parent, _, name = location.rstrip('/').rpartition('/')
+    if not parent:
+        parent = '/' if location.startswith('/') else '.'
+    return parent, name
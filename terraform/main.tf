@@ -61,13 +61,15 @@ resource "aws_s3_bucket_public_access_block" "athena_results" {
 
 # Note: Athena tables with complex structures are better created via SQL
 # We'll create a null_resource to run the CREATE TABLE statement
+# duplicate_of is set by the ETL's --dedup stage; tables created before it need
+#   ALTER TABLE job_skills_db.jobs_with_skills ADD COLUMNS (duplicate_of STRING)
 resource "null_resource" "athena_table" {
   # depends_on = [aws_athena_database.job_skills_db] # Database managed manually
 
   provisioner "local-exec" {
     command = <<-EOT
       aws athena start-query-execution \
-        --query-string "CREATE EXTERNAL TABLE IF NOT EXISTS job_skills_db.jobs_with_skills (id STRING, title STRING, company STRING, description STRING, skills ARRAY<STRING>, skill_count INT) PARTITIONED BY (dt STRING) STORED AS PARQUET LOCATION 's3://${aws_s3_bucket.raw.bucket}/processed/'" \
+        --query-string "CREATE EXTERNAL TABLE IF NOT EXISTS job_skills_db.jobs_with_skills (id STRING, title STRING, company STRING, description STRING, skills ARRAY<STRING>, skill_count INT, duplicate_of STRING) PARTITIONED BY (dt STRING) STORED AS PARQUET LOCATION 's3://${aws_s3_bucket.raw.bucket}/processed/'" \
         --result-configuration OutputLocation=s3://${aws_s3_bucket.athena_results.bucket}/ \
         --region ${var.aws_region}
     EOT
@@ -123,6 +125,12 @@ resource "null_resource" "athena_table" {
 #           aws_s3_bucket.raw.arn,
 #           "${aws_s3_bucket.raw.arn}/*"
 #         ]
+#       },
+#       {
+#         # Data version marker read by the API's Athena result cache
+#         Effect   = "Allow"
+#         Action   = ["s3:PutObject"]
+#         Resource = "${aws_s3_bucket.raw.arn}/processed/_data_version"
 #       }
 #     ]
 #   })
@@ -248,6 +256,15 @@ resource "aws_s3_bucket_notification" "lambda_trigger" {
     filter_suffix       = ".jsonl"
   }
 
+  # Parquet part files from the ETL (processed/dt=YYYY-MM-DD/part-*.parquet):
+  # the Lambda's MSCK REPAIR TABLE makes new dt= partitions visible to Athena
+  lambda_function {
+    lambda_function_arn = aws_lambda_function.etl_trigger.arn
+    events              = ["s3:ObjectCreated:*"]
+    filter_prefix       = "processed/"
+    filter_suffix       = ".parquet"
+  }
+
   depends_on = [aws_lambda_permission.allow_s3]
 }
 
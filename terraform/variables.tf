@@ -25,9 +25,9 @@ variable "email_address" {
 }
 
 variable "lambda_timeout" {
-  description = "Lambda function timeout in seconds"
+  description = "Lambda function timeout in seconds (the ETL trigger waits for MSCK REPAIR TABLE)"
   type        = number
-  default     = 60
+  default     = 300
 }
 
 variable "lambda_memory" {